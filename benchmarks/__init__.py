@@ -0,0 +1 @@
+# Benchmarks of the dashboard, see the Benchmarks section of README.md
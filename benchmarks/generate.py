@@ -0,0 +1,221 @@
+# imports
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------
+# Synthetic module progress data, with the columns of data/SAMPLE_module_data.csv
+#
+# Usage, from the root of the repository:
+#   python -m benchmarks.generate --courses 2 --modules 10 --items 5 --students 500 \
+#       --output data/synthetic_module_data.csv
+# -----------------------------------------------------------
+
+columns = [
+    "completed_at",
+    "course_id",
+    "module_id",
+    "items_count",
+    "module_name",
+    "module_position",
+    "state",
+    "unlock_at",
+    "student_id",
+    "student_name",
+    "items_id",
+    "items_title",
+    "items_position",
+    "items_indent",
+    "items_type",
+    "items_module_id",
+    "item_cp_req_type",
+    "item_cp_req_completed",
+    "course_name",
+    "course_start_date",
+]
+
+module_states = ["completed", "started", "unlocked", "locked"]
+state_weights = [0.45, 0.15, 0.15, 0.25]
+
+item_types = ["Page", "Quiz", "File", "Assignment", "Discussion"]
+requirement_types = [
+    "must_view",
+    "min_score",
+    "must_submit",
+    "must_contribute",
+    "must_mark_done",
+]
+
+
+def generate_course(
+    course_number, modules, items, students, days, start_date, rng, id_offset=0
+):
+    """
+    Returns the module progress rows of a synthetic course, one row per student and item
+
+    Parameters:
+        course_number (int): number of the course, used for its ids and names
+        modules (int): number of modules
+        items (int): number of items per module
+        students (int): number of students
+        days (int): number of days over which the completions are spread
+        start_date (Timestamp): start date of the course
+        rng (Generator): numpy random generator
+        id_offset (int): added to the module, item and student ids of the course
+
+    Returns:
+        course_df (dataframe): rows of the course, with the columns of the sample data
+    """
+    course_id = 100000 + course_number
+    module_ids = id_offset + 1000000 + np.arange(modules)
+    item_ids = id_offset + 5000000 + np.arange(modules * items)
+    student_ids = id_offset + 90000 + np.arange(students)
+
+    # Progress of every student in every module
+    progress_states = rng.choice(
+        len(module_states), size=(modules, students), p=state_weights
+    )
+    completion_minutes = rng.integers(0, days * 24 * 60, size=(modules, students))
+    completed_at = pd.to_datetime(start_date) + pd.to_timedelta(
+        completion_minutes.ravel(), unit="min"
+    )
+    completed_at = np.where(
+        progress_states.ravel() == 0, completed_at.strftime("%d-%m-%Y %H:%M"), ""
+    ).reshape(modules, students)
+
+    # Requirements of every item, about a third of the items are optional
+    item_types_ = rng.choice(item_types, size=modules * items)
+    requirements = rng.choice(requirement_types, size=modules * items).astype(object)
+    requirements[rng.random(modules * items) < 0.3] = ""
+
+    # One row per module, item and student
+    module_index = np.repeat(np.arange(modules), items * students)
+    item_index = np.repeat(np.arange(modules * items), students)
+    student_index = np.tile(np.arange(students), modules * items)
+
+    states = np.array(module_states)[progress_states[module_index, student_index]]
+    required = requirements[item_index] != ""
+    completed = np.where(
+        states == "completed", True, rng.random(len(states)) < 0.3
+    ).astype(str)
+
+    course_df = pd.DataFrame(
+        {
+            "completed_at": completed_at[module_index, student_index],
+            "course_id": course_id,
+            "module_id": module_ids[module_index],
+            "items_count": items,
+            "module_name": [f"Module {m + 1}: Topic {m + 1}" for m in module_index],
+            "module_position": module_index + 1,
+            "state": states,
+            "unlock_at": "",
+            "student_id": student_ids[student_index],
+            "student_name": [f"Student{s + 1}" for s in student_index],
+            "items_id": item_ids[item_index],
+            "items_title": [
+                f"Item {i + 1} of course {course_number}" for i in item_index
+            ],
+            "items_position": item_index % items + 1,
+            "items_indent": 0,
+            "items_type": item_types_[item_index],
+            "items_module_id": module_ids[module_index],
+            "item_cp_req_type": requirements[item_index],
+            "item_cp_req_completed": np.where(required, completed, ""),
+            "course_name": f"Synthetic Course {course_number}",
+            "course_start_date": pd.to_datetime(start_date).strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            ),
+        },
+        columns=columns,
+    )
+
+    return course_df
+
+
+def generate_module_data(
+    path,
+    courses=2,
+    modules=10,
+    items=5,
+    students=100,
+    days=60,
+    start_date="2023-05-01",
+    seed=0,
+):
+    """
+    Writes a synthetic module progress csv, one course at a time
+
+    Parameters:
+        path (str): path of the csv
+        courses (int): number of courses
+        modules (int): number of modules per course
+        items (int): number of items per module
+        students (int): number of students per course
+        days (int): number of days over which the completions are spread
+        start_date (str): start date of the courses
+        seed (int): seed of the random generator
+
+    Returns:
+        rows (int): number of rows written
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    rows = 0
+    for course_number in range(courses):
+        course_df = generate_course(
+            course_number + 1,
+            modules,
+            items,
+            students,
+            days,
+            start_date,
+            rng,
+            id_offset=course_number * 100000,
+        )
+        course_df.to_csv(
+            path,
+            mode="w" if course_number == 0 else "a",
+            header=course_number == 0,
+            index=False,
+        )
+        rows += len(course_df)
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Writes a synthetic module progress csv"
+    )
+    parser.add_argument("--courses", type=int, default=2, help="number of courses")
+    parser.add_argument("--modules", type=int, default=10, help="modules per course")
+    parser.add_argument("--items", type=int, default=5, help="items per module")
+    parser.add_argument("--students", type=int, default=100, help="students per course")
+    parser.add_argument(
+        "--days", type=int, default=60, help="days over which completions are spread"
+    )
+    parser.add_argument("--start-date", default="2023-05-01", help="course start date")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument(
+        "--output", default="data/synthetic_module_data.csv", help="path of the csv"
+    )
+    args = parser.parse_args()
+
+    rows = generate_module_data(
+        args.output,
+        args.courses,
+        args.modules,
+        args.items,
+        args.students,
+        args.days,
+        args.start_date,
+        args.seed,
+    )
+    print(f"Wrote {rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
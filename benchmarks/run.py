@@ -0,0 +1,252 @@
+# imports
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+import numpy as np
+
+from benchmarks.generate import generate_module_data
+
+# -----------------------------------------------------------
+# Scaling benchmarks of the compute paths of the dashboard
+#
+# Usage, from the root of the repository:
+#   python -m benchmarks.run [--students 100 1000 10000] [--modules 10] [--items 5]
+#                            [--courses 2] [--repeat 5] [--output results.json]
+#
+# Every dataset is generated, then measured in a fresh process, so that the load of
+# the data and the caches of one dataset do not affect the next.
+# -----------------------------------------------------------
+
+repository_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+src_path = os.path.join(repository_path, "src")
+
+
+def time_call(function, repeat):
+    """
+    Returns the time of the first call of a function and the median time of the next calls
+
+    Parameters:
+        function (function): called without arguments
+        repeat (int): number of calls after the first
+
+    Returns:
+        cold, warm (float): seconds of the first call and median seconds of the next calls
+    """
+    start = time.perf_counter()
+    function()
+    cold = time.perf_counter() - start
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return cold, statistics.median(times) if times else cold
+
+
+def measure(path, repeat):
+    """
+    Times the compute paths of the dashboard on a dataset, run in a fresh process
+
+    Parameters:
+        path (str): path of the csv
+        repeat (int): number of warm calls of every path
+
+    Returns:
+        measures (dict): timings, cold and warm seconds keyed by path
+    """
+    os.environ["DASHBOARD_DATA_PATH"] = path
+    sys.path.insert(0, src_path)
+
+    timings = {}
+
+    # Reading the csv, the parsed data cache is written on the first load
+    start = time.perf_counter()
+    import app
+
+    timings["import (load, index, layout)"] = [time.perf_counter() - start] * 2
+    timings["read_module_data (csv)"] = time_call(
+        lambda: app.read_module_data(path), min(repeat, 1)
+    )
+    timings["load_module_data (cache)"] = time_call(
+        lambda: app.load_module_data(path), repeat
+    )
+    if app.data is not None:
+        timings["get_dicts"] = time_call(lambda: app.get_dicts(app.data), repeat)
+
+    course_id = app.get_course_ids()[0]
+    catalog = app.get_course_catalog(course_id)
+    module_ids = list(catalog["module_dict"])
+    student_id = next(iter(catalog["student_dict"]))
+    module_id = module_ids[0]
+    items = catalog["module_items"][module_id]
+    selection = [course_id, "All", module_ids]
+    start_date, end_date = app.get_date_range()
+
+    # The filter callbacks, the server store mode filters again on first use
+    timings["filter_student_data"] = time_call(
+        lambda: app.filter_student_data(course_id, student_id), repeat
+    )
+    timings["filter_course_data"] = time_call(
+        lambda: app.filter_course_data(course_id, "All", module_ids), repeat
+    )
+    timings["filter_module_data"] = time_call(
+        lambda: app.filter_module_data(course_id, module_id, items), repeat
+    )
+
+    # The plot aggregations and figures, the first call builds the course cube
+    app.course_cubes.clear()
+    timings["build_course_cube"] = time_call(
+        lambda: app.course_cubes.clear() or app.get_course_cube(course_id), repeat
+    )
+    timings["plot1 figure"] = time_call(
+        lambda: app.build_module_completion_figure(selection, "All", "All"), repeat
+    )
+    timings["plot2 figure"] = time_call(
+        lambda: app.build_duration_figure(selection, "All"), repeat
+    )
+    timings["plot3 figure"] = time_call(
+        lambda: app.build_timeline_figure(selection, start_date, end_date, "All"),
+        repeat,
+    )
+    module_df = app.filter_module_data(course_id, module_id, items)
+    timings["plot4 aggregation"] = time_call(
+        lambda: app.get_item_completion(module_df), repeat
+    )
+    item_completion = app.get_item_completion(module_df)
+    timings["plot4 figure"] = time_call(
+        lambda: app.build_item_completion_figure(item_completion, course_id, module_id),
+        repeat,
+    )
+
+    return {"timings": timings}
+
+
+def get_version():
+    """
+    Returns the git commit of the repository, to compare results across versions
+
+    Returns:
+        version (str): short commit hash, "unknown" outside of a git repository
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(results):
+    """
+    Prints the warm time of every path for every dataset, and the scaling exponent of
+    the time with the number of rows between the smallest and the largest dataset
+
+    Parameters:
+        results (list): rows, students and measures of every dataset, see measure
+    """
+    rows = [result["rows"] for result in results]
+    paths = list(results[0]["timings"])
+    width = max(len(path) for path in paths)
+
+    print()
+    print(
+        f"{'rows':<{width}} "
+        + " ".join(f"{row:>12,}" for row in rows)
+        + f" {'exponent':>9}"
+    )
+    for path in paths:
+        warm = [result["timings"][path][1] for result in results]
+        line = f"{path:<{width}} " + " ".join(f"{t * 1000:>10.1f}ms" for t in warm)
+
+        # Slope of log(time) against log(rows), 1 is linear scaling
+        if len(rows) > 1 and rows[-1] > rows[0] and min(warm) > 0:
+            exponent = np.log(warm[-1] / warm[0]) / np.log(rows[-1] / rows[0])
+            line += f" {exponent:>9.2f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Times the compute paths of the dashboard on synthetic datasets"
+    )
+    parser.add_argument(
+        "--students",
+        type=int,
+        nargs="+",
+        default=[100, 1000, 5000],
+        help="students per course of every dataset",
+    )
+    parser.add_argument("--courses", type=int, default=2, help="number of courses")
+    parser.add_argument("--modules", type=int, default=10, help="modules per course")
+    parser.add_argument("--items", type=int, default=5, help="items per module")
+    parser.add_argument(
+        "--days", type=int, default=60, help="days over which completions are spread"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="warm calls per path")
+    parser.add_argument("--output", help="json file to save the results to")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Run by the benchmark itself in a fresh process, see below
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.repeat)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for students in args.students:
+            path = os.path.join(folder, f"module_data_{students}.csv")
+            rows = generate_module_data(
+                path, args.courses, args.modules, args.items, students, args.days
+            )
+            print(f"Measuring {rows:,} rows ({students} students per course)")
+
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.run",
+                    "--measure",
+                    path,
+                    "--repeat",
+                    str(args.repeat),
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+                cwd=folder,
+                env={**os.environ, "PYTHONPATH": repository_path},
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            result.update(rows=rows, students=students)
+            results.append(result)
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "version": get_version(),
+                    "parameters": vars(args),
+                    "results": results,
+                },
+                file,
+                indent=1,
+            )
+        print(f"\nSaved the results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# Gunicorn configuration of the dashboard, from the root of the repository run
+#   gunicorn --config gunicorn.conf.py
+#
+# The data is loaded once in the master process and the workers are forked from it,
+# so they share one in-memory copy of the data instead of each reading the csv.
+
+import os
+import sys
+import multiprocessing
+
+wsgi_app = "app:server"
+pythonpath = "src"
+
+bind = os.environ.get("DASHBOARD_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("DASHBOARD_WORKERS", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("DASHBOARD_THREADS", 4))
+
+# Load the app, and build the lookup tables and progress cubes of every course,
+# before forking the workers
+preload_app = True
+os.environ.setdefault("DASHBOARD_PRELOAD", "1")
+
+# Threads do not survive the fork, the data watcher is started in every worker
+# instead of the master process
+watch_interval = float(os.environ.get("DASHBOARD_WATCH_INTERVAL", 0))
+os.environ["DASHBOARD_WATCH_INTERVAL"] = "0"
+
+
+def post_fork(server, worker):
+    """
+    Starts the data watcher of a worker, see start_watcher in src/app.py
+    """
+    if watch_interval > 0:
+        sys.modules["app"].start_watcher(watch_interval)
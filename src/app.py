@@ -1,12 +1,23 @@
 # imports
-from dash import dash, html, dcc, Input, Output
+from dash import dash, html, dcc, Input, Output, ctx, no_update
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
+import flask
 import dash
 from dash import dash_table
 from dash.dependencies import Input, Output, State
 import re
 import os
+import io
+import json
+import base64
+import hashlib
+import sqlite3
+import gc
+import threading
+import uuid
+import copy
+import hmac
 
 import pandas as pd
 import numpy as np
@@ -15,17 +26,32 @@ import plotly.io as pio
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
-from collections import defaultdict
+# pyarrow is optional, it is only needed for the "arrow" and "parquet" store modes
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pandas.api.types import union_categoricals
 
 from datetime import *
 import datetime
 
+# imported after datetime, whose wildcard import shadows the time module
+import time
+
 pio.renderers.default = "iframe"
 # -----------------------------------------------------------
 external_stylesheets = [dbc.themes.BOOTSTRAP]
 
 app = dash.Dash(__name__, external_stylesheets=external_stylesheets)
 
+# WSGI entry point, e.g. gunicorn --config gunicorn.conf.py, see the README
+server = app.server
+
 ####################
 # Helper Functions #
 ####################
@@ -50,702 +76,2894 @@ def remove_special_characters(string):
     return cleaned_string
 
 
-def get_dicts(df):
+class LRUCache:
     """
-    Creates and returns dictionaries,
+    A bounded, thread safe, least recently used cache with hit and miss counters
 
     Parameters:
-        df (dataframe): passed pandas dataframe
+        maxsize (int): maximum number of entries, the least recently used are evicted first
+        maxbytes (int): maximum total size of the entries in bytes, not bounded when None
+        on_evict (function): called with the key and value of every evicted entry
+    """
+
+    def __init__(self, maxsize, maxbytes=None, on_evict=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.on_evict = on_evict
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached value of key, None if it is not cached
+        """
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value, size=0):
+        """
+        Caches value under key and evicts the least recently used entries beyond maxsize
+        and maxbytes, the entry just cached is kept even when it is larger than maxbytes
+        """
+        with self.lock:
+            self.nbytes += size - self.sizes.get(key, 0)
+            self.entries[key] = value
+            self.sizes[key] = size
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > 1 and (
+                len(self.entries) > self.maxsize
+                or (self.maxbytes is not None and self.nbytes > self.maxbytes)
+            ):
+                evicted, evicted_value = self.entries.popitem(last=False)
+                self.nbytes -= self.sizes.pop(evicted)
+                if self.on_evict is not None:
+                    self.on_evict(evicted, evicted_value)
+
+    def discard(self, key):
+        """
+        Removes the entry of key if it is cached
+        """
+        with self.lock:
+            if key in self.entries:
+                del self.entries[key]
+                self.nbytes -= self.sizes.pop(key)
+
+    def clear(self):
+        """
+        Removes all the entries
+        """
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.nbytes = 0
+
+
+def read_module_data(path, chunksize=None):
+    """
+    Reads the module progress csv in chunks and converts the columns to their data types
+
+    Only the columns used by the dashboard are read. Each chunk is converted on its own,
+    so that the memory peak stays close to the size of the final data instead of the
+    size of the csv read as text.
+
+    Parameters:
+        path (str): path of the csv
+        chunksize (int): number of rows per chunk, defaults to data_chunksize
 
     Returns:
-        module_num, module_dict, item_num, item_dict, student_dict (dict): Created dictionaries
+        df (dataframe): module progress data
     """
+    df = concat_module_data(list(iter_module_data(path, chunksize)))
 
-    # Initialize dicts
-    module_num, module_dict, item_num, item_dict, student_dict = (
-        defaultdict(str) for _ in range(5)
+    # remove special characters from course_name, once per distinct course name
+    df["course_name"] = (
+        df["course_name"].map(remove_special_characters).astype("category")
     )
 
-    # Dictionary to map id to names
-    for _, row in df.iterrows():
-        module_dict[str(row["module_id"])] = re.sub(
-            r"^Module\s+\d+:\s+", "", row["module_name"]
+    # parse the course start date, once per distinct start date
+    df["course_start_date"] = df["course_start_date"].cat.rename_categories(
+        pd.to_datetime(
+            df["course_start_date"].cat.categories, format="%Y-%m-%dT%H:%M:%SZ"
         )
-        item_dict[str(row["items_id"])] = row["items_title"]
-        student_dict[str(row["student_id"])] = row["student_name"]
-
-    # Dictionary to map the module id to a module number used for labeling
-    for i, k in enumerate(module_dict.keys()):
-        module_num[k] = f"Module {i+1}:"
-
-    # Dictionary to map the item id to a item number used for labeling
-    for i, k in enumerate(item_dict.keys()):
-        item_num[k] = f"Item {i+1}:"
+    )
 
-    return module_num, module_dict, item_num, item_dict, student_dict
+    return df
 
 
-def get_item_completion_percentage(df, item):
+def iter_module_data(path, chunksize=None):
     """
-    Returns the percentage of students who completed 'item'
+    Yields the chunks of the module progress csv, with the columns converted to their data types
 
     Parameters:
-        df (dataframe): passed pandas dataframe
-        item (str): name of item
+        path (str): path of the csv
+        chunksize (int): number of rows per chunk, defaults to data_chunksize
 
     Returns:
-        percentage (float): computed percentage
+        chunk (dataframe): rows of the chunk
     """
+    for chunk in pd.read_csv(
+        path,
+        usecols=list(column_dtypes),
+        dtype={col: dtype for col, dtype in column_dtypes.items() if dtype},
+        chunksize=chunksize or data_chunksize,
+    ):
+        # convert the timestamp to datetime format
+        chunk["completed_at"] = pd.to_datetime(
+            chunk["completed_at"], format="%d-%m-%Y %H:%M"
+        )
 
-    # filter df by the provided item
-    df_item = df[df.items_id.astype(str) == item]
+        # The completion status is read as True/False or 1/0 depending on the export
+        chunk["item_cp_req_completed"] = (
+            chunk["item_cp_req_completed"].astype(float).astype("category")
+        )
 
-    # Handling edge case
-    if df_item.shape[0] == 0:
-        return 0
+        yield chunk
 
-    # total students who are/will work on item
-    total_item_students = df_item.student_id.unique().size
 
-    # compute percentage
-    percentage = (
-        df_item[df_item.item_cp_req_completed == 1.0].student_id.unique().size
-        / total_item_students
-    )
-    return percentage
+def concat_module_data(frames):
+    """
+    Concatenates module progress data, keeping the categorical columns categorical
+
+    The frames are concatenated column by column, the categorical columns on the union of
+    the categories of the frames. The columns of the frames are released as we go.
 
+    Parameters:
+        frames (list): module progress dataframes
+
+    Returns:
+        df (dataframe): concatenated module progress data
+    """
+    columns = {}
+    for col in column_dtypes:
+        parts = [frame.pop(col) for frame in frames]
+        if col in categorical_cols:
+            columns[col] = pd.Series(union_categoricals(parts, ignore_order=True))
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+        del parts
+
+    return pd.DataFrame(columns)
 
-def get_completed_percentage(df, module, state="completed"):
+
+def get_file_state(path):
     """
-    Returns the percentage of students with module in given state
+    Returns the size, modification time and a digest of the start and end of a file
 
     Parameters:
-        df (dataframe): passed pandas dataframe
-        module (str): module_id
-        state (str): module state
+        path (str): path of the file
 
     Returns:
-        percentage (float): computed percentage
+        state (dict): size, mtime and digest of the file
     """
-    # filter the dataframe with the passed module
-    df_module = df[df.module_id.astype(str) == module]
+    stat = os.stat(path)
 
-    # Handling edge case
-    if df_module.shape[0] == 0:
-        return 0
+    with open(path, "rb") as file:
+        digest = get_file_digest(file, stat.st_size)
 
-    total_module_students = df_module.student_id.unique().size
-    percentage = (
-        df_module[df_module.state == state].student_id.unique().size
-        / total_module_students
-    )
-    return percentage
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "digest": digest}
 
 
-def get_completed_percentage_date(df, module, date):
+def get_file_digest(file, size, block=65536):
     """
-    Returns the completed percentage of a module in df until a specified date
+    Returns a digest of the first and last bytes of the first 'size' bytes of a file
 
     Parameters:
-        df (dataframe): passed pandas dataframe
-        module (str): module_id
-        date (datetime.date): date till which the completion percentage is to be computed
+        file (file): file opened in binary mode
+        size (int): number of bytes of the file considered
+        block (int): number of bytes read at the start and at the end
 
     Returns:
-        percentage (float): computed percentage
+        digest (str): hexadecimal digest
     """
+    file.seek(0)
+    head = file.read(min(block, size))
+    file.seek(max(size - block, 0))
+    tail = file.read(size - max(size - block, 0))
 
-    # Convert the date to datetime with time component set to midnight
-    datetime_date = datetime.datetime.combine(date, datetime.datetime.min.time())
+    return hashlib.sha1(head + tail).hexdigest()
 
-    # filter df
-    df_module = df[df.module_id.astype(str) == module]
 
-    total_module_students = df_module.student_id.unique().size
+def load_module_data(path):
+    """
+    Returns the module progress data, from the parsed data cache when it is up to date
 
-    # Handling edge case, when no module is computed.
-    if df_module[df_module.state == "completed"].size == 0:
-        return 0.0
+    The parsed data is cached as a feather (Arrow IPC) file next to the csv, stamped with
+    the size and modification time of the csv. The csv is read again, and the cache
+    rebuilt, only when the csv changes. Without pyarrow the csv is read every time.
 
-    percentage = (
-        df_module[
-            (df_module.state == "completed")
-            & (df_module["completed_at"].dt.date <= date)
-        ]
-        .student_id.unique()
-        .size
-        / total_module_students
+    Parameters:
+        path (str): path of the csv
+
+    Returns:
+        df (dataframe): module progress data
+    """
+    if pa is None:
+        return read_module_data(path)
+
+    cache_path = os.path.splitext(path)[0] + ".feather"
+    stat = os.stat(path)
+    source = json.dumps(
+        {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "columns": column_dtypes,
+            "version": data_cache_version,
+        }
+    ).encode()
+
+    if os.path.exists(cache_path):
+        # An unreadable cache, e.g. truncated, is read from the csv and written again
+        try:
+            with pa.OSFile(cache_path, "rb") as cache:
+                reader = pa.ipc.open_file(cache)
+                if (reader.schema.metadata or {}).get(b"module_data_source") == source:
+                    return reader.read_all().to_pandas()
+        except (OSError, pa.ArrowException) as error:
+            print(f"Could not read the parsed data cache {cache_path}: {error}")
+
+    df = read_module_data(path)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema = table.schema.with_metadata(
+        {**table.schema.metadata, b"module_data_source": source}
     )
 
-    return percentage
+    # The cache is written to a file of this process and then moved in place, so other
+    # processes never read or write a partly written cache
+    temp_path = f"{cache_path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    try:
+        with pa.OSFile(temp_path, "wb") as cache:
+            with pa.ipc.new_file(cache, schema) as writer:
+                writer.write_table(table.cast(schema))
+        os.replace(temp_path, cache_path)
+    except (OSError, pa.ArrowException) as error:
+        print(f"Could not write the parsed data cache {cache_path}: {error}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
+    return df
 
-# ---------------------------------------------------
-# reading the data
-data = pd.read_csv("data/module_data.csv")
 
-# dtype conversion
-categorical_cols = [
-    "course_id",
-    "module_id",
-    "module_name",
-    "state",
-    "student_id",
-    "student_name",
-    "items_id",
-    "items_title",
-    "items_type",
-    "items_module_id",
-    "item_cp_req_type",
-    "item_cp_req_completed",
-    "course_name",
-]
+def scan_data_file(path):
+    """
+    Returns the courses of a data file with their number of rows and completion dates,
+    reading only the columns needed in chunks
 
-# convert the timestamp to datetime format
-# fix the column data types
-data["completed_at"] = pd.to_datetime(data["completed_at"], format="%d-%m-%Y %H:%M")
+    Parameters:
+        path (str): path of the csv
 
-for col in categorical_cols:
-    data[col] = data[col].astype("category")
+    Returns:
+        courses (dict): course_name, rows, first_date and last_date (ISO date or None)
+            keyed by course_id (str)
+    """
+    courses = {}
+
+    for chunk in pd.read_csv(
+        path,
+        usecols=["course_id", "course_name", "completed_at"],
+        dtype=str,
+        chunksize=data_chunksize,
+    ):
+        chunk["completed_at"] = pd.to_datetime(
+            chunk["completed_at"], format="%d-%m-%Y %H:%M"
+        )
 
-# remove special characters from course_name
-data["course_name"] = data["course_name"].apply(remove_special_characters)
+        for course_id, group in chunk.groupby("course_id"):
+            course = courses.setdefault(
+                course_id,
+                {
+                    "course_name": remove_special_characters(
+                        group["course_name"].iloc[0]
+                    ),
+                    "rows": 0,
+                    "first_date": None,
+                    "last_date": None,
+                },
+            )
+            course["rows"] += len(group)
 
+            dates = group["completed_at"].dropna()
+            if len(dates):
+                first, last = (
+                    dates.min().date().isoformat(),
+                    dates.max().date().isoformat(),
+                )
+                course["first_date"] = min(filter(None, [course["first_date"], first]))
+                course["last_date"] = max(filter(None, [course["last_date"], last]))
 
-############################
-#  Defining vairables      #
-############################
+    return courses
 
-module_status = ["completed", "started", "unlocked", "locked"]
 
-# Make the mapping of any id to the corresponding names
-global course_dict
-global module_dict
-global item_dict
+def load_manifest(path):
+    """
+    Returns the manifest of a directory of per-course data files
 
-course_dict, module_dict, item_dict = (defaultdict(str) for _ in range(3))
+    The manifest lists the courses of every csv of the directory and is saved in
+    manifest.json. Only the files added or changed since the manifest was saved are
+    read, the rows of the courses are read on first selection, see get_course_data.
 
-for _, row in data.iterrows():
-    course_dict[str(row["course_id"])] = row["course_name"]
-    module_dict[str(row["module_id"])] = row["module_name"]
-    item_dict[str(row["items_id"])] = row["items_title"]
+    Parameters:
+        path (str): path of the directory
 
+    Returns:
+        manifest (dict): size, mtime and courses (see scan_data_file) keyed by file name
+    """
+    manifest_path = os.path.join(path, "manifest.json")
+
+    saved = {}
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path) as file:
+                saved = json.load(file)
+        except (OSError, ValueError) as error:
+            print(f"Could not read the manifest {manifest_path}: {error}")
+
+    manifest = {}
+    for name in sorted(os.listdir(path)):
+        if not name.endswith(".csv"):
+            continue
 
-####################
-#     Layout       #
-####################
+        stat = os.stat(os.path.join(path, name))
+        entry = saved.get(name)
+        if entry is None or [entry["size"], entry["mtime"]] != [
+            stat.st_size,
+            stat.st_mtime_ns,
+        ]:
+            entry = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "courses": scan_data_file(os.path.join(path, name)),
+            }
+        manifest[name] = entry
 
-# Styling
+    if manifest != saved:
+        try:
+            with open(manifest_path, "w") as file:
+                json.dump(manifest, file, indent=1)
+        except OSError as error:
+            print(f"Could not write the manifest {manifest_path}: {error}")
 
-# Define the style for the tabs
-tab_style = {
-    "height": "50px",
-    "padding": "8px",
-    "textAlign": "center",
-    "display": "flex",
-    "alignItems": "center",
-    "justifyContent": "center",
-    "border-radius": "10px",
-    "margin-right": "10px",
-    "margin-left": "10px",
-}
+    return manifest
 
-# Define the style for the selected tab
-selected_tab_style = {
-    "height": "50px",
-    "padding": "5px",
-    "borderTop": "2px solid #13233e",
-    "borderBottom": "2px solid #13233e",
-    "backgroundColor": "#13233e",
-    "color": "white",
-    "textAlign": "center",
-    "display": "flex",
-    "alignItems": "center",
-    "justifyContent": "center",
-    "border-radius": "10px",
-    "margin-right": "10px",
-    "margin-left": "10px",
-}
 
-# Define header style
-heading_style = {
-    "borderTop": "2px solid #aab4c2",
-    "borderBottom": "2px solid #aab4c2",
-    "backgroundColor": "#aab4c2",
-    "color": "white",
-    "padding": "5px",
-    "text-align": "center",
-}
+def get_course_files(manifest):
+    """
+    Returns the file and summary of every course of a manifest
 
-sub_heading_style = {
-    "font-size": "20px",
-    "font-weight": "bold",
-    "color": "#13233e",
-    "padding": "5px",
-    "text-align": "center",
-}
+    Parameters:
+        manifest (dict): manifest of the data directory, see load_manifest
 
-# Define text style
-text_style = {
-    "font-size": "16px",
-    "font-weight": "bold",
-    "color": "#13233e",
-    "padding": "5px",
-}
+    Returns:
+        course_files (dict): file, course_name, rows, first_date and last_date keyed by
+            course_id (str)
+    """
+    return {
+        course_id: {"file": name, **course}
+        for name, entry in manifest.items()
+        for course_id, course in entry["courses"].items()
+    }
 
-sidebar_text_style = {
-    "font-size": "10px",
-    "display": "inline-block",
-    "color": "#13233e",
-    "padding": "5px",
-}
 
+def build_sql_database(path, db_path):
+    """
+    Writes the module progress csv to an SQLite database, indexed by course
 
-# Style Html Div
-div_style = {
-    "display": "flex",
-    "justify-content": "center",
-    "align-items": "center",
-}
+    The database is written to a temporary file of this process which then replaces
+    db_path, so that the database being read is never partially written, even when
+    several processes write it at the same time.
 
-# Dropdpown options
+    Parameters:
+        path (str): path of the csv
+        db_path (str): path of the database
+    """
+    tmp_path = f"{db_path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
 
-course_options = [
-    {"label": course_name, "value": course_id}
-    for course_id, course_name in course_dict.items()
-]
+    connection = sqlite3.connect(tmp_path)
+    try:
+        for chunk in iter_module_data(path):
+            rows = pd.DataFrame(
+                {
+                    col: chunk[col].astype(object)
+                    for col in column_dtypes
+                    if col not in ["completed_at", "items_position"]
+                }
+            )
+            rows["completed_at"] = chunk["completed_at"].dt.strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+            rows["items_position"] = chunk["items_position"]
+            rows["item_cp_req_completed"] = chunk["item_cp_req_completed"].astype(float)
+            rows["course_name"] = rows["course_name"].map(remove_special_characters)
+            rows.to_sql("module_data", connection, if_exists="append", index=False)
 
+        connection.execute(
+            "CREATE INDEX module_data_course ON module_data (course_id, module_id, student_id)"
+        )
+        connection.execute(
+            "CREATE INDEX module_data_items ON module_data (course_id, items_id)"
+        )
+        connection.execute("CREATE TABLE source (stamp TEXT)")
+        connection.execute("INSERT INTO source VALUES (?)", [get_sql_stamp(path)])
+        connection.commit()
+    except Exception:
+        connection.close()
+        os.remove(tmp_path)
+        raise
 
-# Colorblind friendly colors
-# Ref: https://jacksonlab.agronomy.wisc.edu/2016/05/23/15-level-colorblind-friendly-palette/
-color_palette_1 = [
-    "#000000",
-    "#004949",
-    "#009292",
-    "#ff6db6",
-    "#ffb6db",
-    "#490092",
-    "#006ddb",
-    "#b66dff",
-    "#6db6ff",
-    "#b6dbff",
-    "#920000",
-    "#924900",
-    "#db6d00",
-    "#24ff24",
-    "#ffff6d",
-]
+    connection.close()
+    os.replace(tmp_path, db_path)
 
-# Ref: https://stackoverflow.com/questions/65013406/how-to-generate-30-distinct-colors-that-are-color-blind-friendly
-color_palette_2 = [
-    "#999999",
-    "#E69F00",
-    "#56B4E9",
-    "#009E73",
-    "#F0E442",
-    "#0072B2",
-    "#D55E00",
-    "#CC79A7",
-]
 
-# Ref: https://stackoverflow.com/questions/65013406/how-to-generate-30-distinct-colors-that-are-color-blind-friendly
-color_palette_3 = [
-    "#000000",
-    "#E69F00",
-    "#56B4E9",
-    "#009E73",
-    "#F0E442",
-    "#0072B2",
-    "#D55E00",
-    "#CC79A7",
-]
+def get_sql_stamp(path):
+    """
+    Returns the stamp of the database of a csv, its size and modification time
 
-# Plots font style, adjust as per your requirement
-axis_label_font_size = 14
-title_font_size = 16
+    Parameters:
+        path (str): path of the csv
 
+    Returns:
+        stamp (str): JSON stamp
+    """
+    stat = os.stat(path)
 
-##############
-# Callbacks  #
-##############
+    return json.dumps(
+        {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "columns": column_dtypes,
+            "version": data_cache_version,
+        }
+    )
 
 
-@app.callback(
-    Output("module-checkboxes", "options"),
-    Output("module-checkboxes", "value"),
-    Input("course-dropdown", "value"),
-)
-def update_module_checklist(val):
+def load_sql_database(path):
     """
-    Updates the module checklist in the 'View Modules'
+    Returns the path of the SQLite database of a csv, written again when the csv changed
 
     Parameters:
-        val (str): Selected Course
+        path (str): path of the csv
 
     Returns:
-        module_options (list): Module Checkboxes options
-        def_value (list): Module checkbox default selections
+        db_path (str): path of the database, next to the csv
     """
+    db_path = os.path.splitext(path)[0] + ".sqlite"
 
-    # Handling edge case
-    if val is None:
-        module_options = [
-            {"label": "No Course selected", "value": "No Course selected"}
-        ]
-        def_value = module_options
-        return module_options, def_value
+    if os.path.exists(db_path):
+        connection = sqlite3.connect(db_path)
+        try:
+            stamp = connection.execute("SELECT stamp FROM source").fetchone()
+        except sqlite3.DatabaseError:
+            stamp = None
+        finally:
+            connection.close()
 
-    # filter the data by selected course
-    subset_data = data.copy()
-    selected_course = remove_special_characters(course_dict[val])
-    subset_data = subset_data[subset_data.course_name == selected_course]
+        if stamp is not None and stamp[0] == get_sql_stamp(path):
+            return db_path
 
-    # Create dictionaries
-    global module_num
-    module_num, module_dict, item_num, item_dict, student_dict = get_dicts(subset_data)
+    build_sql_database(path, db_path)
 
-    if val != None:
-        module_options = [
-            {
-                "label": f"{module_num[module_id]}" + " " + f"{module_name}",
-                "value": module_id,
-            }
-            for module_id, module_name in module_dict.items()
-        ]
+    return db_path
 
-    # define a global color map for the modules
-    global module_colors
-    module_colors = {
-        module_num[module_id]: color_palette_3[i]
-        for module_id, i in zip(module_num.keys(), np.arange(len(module_num.keys())))
-    }
 
-    # default value, selects all the items in the checklist
-    def_value = [module_options[i]["value"] for i in range(len(module_options))]
-    return module_options, def_value
+def get_sql_connection():
+    """
+    Returns the read only connection of the current thread to the database
 
+    Returns:
+        connection (Connection): SQLite connection
+    """
+    connection = getattr(sql_connections, "connection", None)
+
+    # Connections are not shared with other threads or with forked processes, and are
+    # opened again once the database is written again
+    state = [os.getpid(), sql_path, sql_version]
+    if connection is None or sql_connections.state != state:
+        connection = sqlite3.connect(
+            f"file:{sql_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        sql_connections.connection = connection
+        sql_connections.state = state
 
-# # Update items checklist
-@app.callback(
-    Output("item-checkboxes", "options"),
-    Output("item-checkboxes", "value"),
-    [Input("course-dropdown", "value"), Input("module-dropdown", "value")],
-)
-def update_item_checklist(selected_course, selected_module):
+    return connection
+
+
+def get_sql_conditions(course_id, filters):
     """
-    Updates the module checklist in the 'View Items' tab
+    Returns the WHERE clause and parameters selecting the rows of a course and the
+    selected ids
 
     Parameters:
-        selected_course (str): Selected Course
-        selected_module (str): Selected Module
+        course_id (str): course_id
+        filters (dict): selected id or ids keyed by column, a column is not filtered
+            when its selection is "All"
 
     Returns:
-        item_options (list): Item Checkboxes options
-        def_value (list): Item checkbox default selections
+        where (str): WHERE clause
+        params (list): parameters of the clause
     """
+    conditions = ["course_id = ?"]
+    params = [str(course_id)]
 
-    # Handling edge case
-    if selected_course is None or selected_module is None:
-        item_options = [
-            {
-                "label": "Either Course or Module not selected",
-                "value": "No Course selected",
-            }
-        ]
-        def_value = item_options
-        return item_options, def_value
+    for col, values in filters.items():
+        if values == "All":
+            continue
+        if values is None or isinstance(values, str):
+            values = [values]
+        conditions.append(f"{col} IN ({', '.join('?' * len(values))})")
+        params += [None if value is None else str(value) for value in values]
 
-    # filter by the course selected and selected module
-    subset_data = data.copy()
-    selected_course = remove_special_characters(course_dict[selected_course])
+    return " WHERE " + " AND ".join(conditions), params
 
-    subset_data = subset_data[
-        (subset_data.course_name == selected_course)
-        & (subset_data.module_id.astype(str) == selected_module)
-    ]
 
-    # Define dictionaries for items under the selcted course and selected module
-    items_pos = defaultdict(str)
-    items_id_name = defaultdict(str)
+def query_module_data(course_id, columns=None, **filters):
+    """
+    Returns the rows of a course from the database, filtered by the selected ids
 
-    for _, row in subset_data.iterrows():
-        items_pos[str(row["items_id"])] = f"Item {row['items_position']}:"
-        items_id_name[str(row["items_id"])] = row["items_title"]
+    Parameters:
+        course_id (str): course_id
+        columns (list): columns to read, all the columns by default
+        filters: selected id or ids keyed by column, e.g. student_id or module_id
+
+    Returns:
+        df (dataframe): module progress data with the column types of read_module_data
+    """
+    columns = columns or list(column_dtypes)
+    where, params = get_sql_conditions(course_id, filters)
+    df = pd.read_sql_query(
+        f"SELECT {', '.join(columns)} FROM module_data{where} ORDER BY rowid",
+        get_sql_connection(),
+        params=params,
+    )
+
+    for col in df.columns:
+        if col == "completed_at":
+            df[col] = pd.to_datetime(df[col], format="%Y-%m-%d %H:%M:%S")
+        elif col == "course_start_date":
+            df[col] = pd.to_datetime(df[col], format="%Y-%m-%dT%H:%M:%SZ").astype(
+                "category"
+            )
+        elif col == "items_position":
+            df[col] = df[col].astype("Int64")
+        elif col == "item_cp_req_completed":
+            df[col] = df[col].astype(float).astype("category")
+        else:
+            df[col] = df[col].astype("category")
+
+    return df
+
+
+def query_course_cube(course_id):
+    """
+    Returns the progress cube of a course, aggregated by the database
+
+    Parameters:
+        course_id (str): course_id
+
+    Returns:
+        cube (dict): progress and completions dataframes, see build_course_cube
+    """
+    connection = get_sql_connection()
+    params = [str(course_id)]
+
+    progress = pd.read_sql_query(
+        "SELECT module_id, student_id, state, date(completed_at) AS completed_at "
+        "FROM module_data WHERE course_id = ? "
+        "GROUP BY module_id, student_id, state, date(completed_at) "
+        "ORDER BY MIN(rowid)",
+        connection,
+        params=params,
+    )
+    progress["completed_at"] = pd.to_datetime(progress["completed_at"])
+
+    completions = pd.read_sql_query(
+        "SELECT module_id, student_id, MIN(completed_at) AS completed_at "
+        "FROM module_data "
+        "WHERE course_id = ? AND state = 'completed' AND completed_at IS NOT NULL "
+        "GROUP BY module_id, student_id",
+        connection,
+        params=params,
+    )
+    completions["completed_at"] = pd.to_datetime(
+        completions["completed_at"], format="%Y-%m-%d %H:%M:%S"
+    )
+    course_start_dates = pd.to_datetime(
+        [
+            row[0]
+            for row in connection.execute(
+                "SELECT DISTINCT course_start_date FROM module_data "
+                "WHERE course_id = ? AND course_start_date IS NOT NULL",
+                params,
+            )
+        ],
+        format="%Y-%m-%dT%H:%M:%SZ",
+    )
+    completions["duration"] = get_durations(
+        completions["completed_at"], course_start_dates
+    )
+
+    for table in [progress, completions]:
+        for col in ["module_id", "student_id", "state"]:
+            if col in table:
+                table[col] = table[col].astype("category")
+
+    cube = {"progress": progress, "completions": completions}
+
+    return cube
+
+
+def query_item_completion(selected_course, selected_module, selected_items):
+    """
+    Returns the completion of every selected item, aggregated by the database
+
+    Parameters:
+        selected_course (str): Selected Course
+        selected_module (str): Selected Module
+        selected_items (list): Selected Items
+
+    Returns:
+        item_completion (dataframe): see get_item_completion
+    """
+    where, params = get_sql_conditions(
+        selected_course, {"module_id": selected_module, "items_id": selected_items}
+    )
+    item_completion = pd.read_sql_query(
+        "SELECT items_id, "
+        "MAX(item_cp_req_type IS NOT NULL) AS required, "
+        "COUNT(DISTINCT student_id) AS students, "
+        "COUNT(DISTINCT CASE WHEN item_cp_req_completed = 1 THEN student_id END) "
+        f"AS completed_students FROM module_data{where} "
+        "GROUP BY items_id ORDER BY MIN(rowid)",
+        get_sql_connection(),
+        params=params,
+        index_col="items_id",
+    )
+    item_completion["required"] = item_completion["required"].astype(bool)
+    item_completion.index = item_completion.index.astype(str)
+
+    return item_completion
 
-    if selected_course != None and selected_module != None:
-        item_options = [
-            {
-                "label": f"{items_pos[item_id]}" + " " + f"{item_name}",
-                "value": item_id,
-            }
-            for item_id, item_name in items_id_name.items()
-        ]
 
-    # define a global color map for the items
-    global item_colors
-    item_colors = {
-        items_pos[item_id]: color_palette_3[i]
-        for item_id, i in zip(items_pos.keys(), np.arange(len(items_pos.keys())))
+def query_course_summaries():
+    """
+    Returns the name, number of rows and completion dates of every course of the database
+
+    Returns:
+        courses (dict): course_name, rows, first_date and last_date (ISO date or None)
+            keyed by course_id (str), see scan_data_file
+    """
+    rows = get_sql_connection().execute(
+        "SELECT course_id, MIN(course_name), COUNT(*), "
+        "date(MIN(completed_at)), date(MAX(completed_at)) "
+        "FROM module_data GROUP BY course_id ORDER BY MIN(rowid)"
+    )
+
+    return {
+        str(course_id): {
+            "course_name": course_name,
+            "rows": count,
+            "first_date": first_date,
+            "last_date": last_date,
+        }
+        for course_id, course_name, count, first_date, last_date in rows
     }
 
-    # default selection
-    def_value = [item_options[i]["value"] for i in range(len(item_options))]
-    return item_options, def_value
 
+def get_catalog(df):
+    """
+    Creates the lookup tables from ids to names and labels, built from the distinct values of df
 
-# Update module-dropdown options
-@app.callback(
-    Output("module-dropdown", "options"),
-    Output("module-dropdown", "value"),
-    Input("course-dropdown", "value"),
-)
-def update_module_dropdown(val):
+    Parameters:
+        df (dataframe): passed pandas dataframe
+
+    Returns:
+        catalog (dict): lookup tables, course_name, module_num, module_dict,
+            module_names, item_num, item_dict, item_pos, student_dict, module_items,
+            module_colors and item_colors
     """
-    Updates the module dropdown in the 'View Items' tab
+    modules = df[["module_id", "module_name"]].drop_duplicates("module_id")
+    items = df[["module_id", "items_id", "items_title", "items_position"]]
+    items = items.drop_duplicates("items_id")
+    students = df[["student_id", "student_name"]].drop_duplicates("student_id")
+
+    module_ids = modules["module_id"].astype(str).tolist()
+    item_ids = items["items_id"].astype(str).tolist()
+    student_ids = students["student_id"].astype(str).tolist()
+
+    # Remove the "Module N:" prefix once per distinct module name
+    module_names = (
+        modules["module_name"]
+        .astype(str)
+        .str.replace(r"^Module\s+\d+:\s+", "", regex=True)
+    )
+
+    # Item labels are taken from the item position within the module
+    item_positions = "Item " + items["items_position"].astype(str) + ":"
+
+    # Ordered item ids of every module
+    module_items = defaultdict(list)
+    for module_id, item_id in zip(items["module_id"].astype(str), item_ids):
+        module_items[module_id].append(item_id)
+
+    catalog = {
+        "course_name": str(df["course_name"].iloc[0]) if len(df) else None,
+        "module_num": defaultdict(
+            str, {k: f"Module {i+1}:" for i, k in enumerate(module_ids)}
+        ),
+        "module_dict": defaultdict(str, zip(module_ids, module_names)),
+        "module_names": dict(zip(module_ids, modules["module_name"].astype(str))),
+        "item_num": defaultdict(
+            str, {k: f"Item {i+1}:" for i, k in enumerate(item_ids)}
+        ),
+        "item_dict": defaultdict(str, zip(item_ids, items["items_title"])),
+        "item_pos": defaultdict(str, zip(item_ids, item_positions)),
+        "student_dict": defaultdict(str, zip(student_ids, students["student_name"])),
+        "module_items": module_items,
+    }
+
+    # Colors of the module and item labels, the palette is reused for long courses
+    catalog["module_colors"] = {
+        catalog["module_num"][module_id]: color_palette_3[i % len(color_palette_3)]
+        for i, module_id in enumerate(module_ids)
+    }
+    catalog["item_colors"] = {
+        label: color_palette_3[i % len(color_palette_3)]
+        for i, label in enumerate(dict.fromkeys(item_positions))
+    }
+
+    return catalog
+
+
+def get_dicts(df):
+    """
+    Creates and returns dictionaries,
 
     Parameters:
-        val (str): Selected Course
+        df (dataframe): passed pandas dataframe
 
     Returns:
-        module_options (list): Module selection options
-        def_value (str): Module default selection
+        module_num, module_dict, item_num, item_dict, student_dict (dict): Created dictionaries
+    """
+    catalog = get_catalog(df)
+
+    return (
+        catalog["module_num"],
+        catalog["module_dict"],
+        catalog["item_num"],
+        catalog["item_dict"],
+        catalog["student_dict"],
+    )
+
+
+def get_durations(completed_at, course_start_dates):
     """
+    Returns the whole days from the course start date to the completions, kept as a
+    compact integer column
 
+    Parameters:
+        completed_at (series): completion timestamps
+        course_start_dates (array): distinct start dates of the course
+
+    Returns:
+        durations (array): days to complete, missing without a unique course start date
+    """
     # Handling edge case
-    if val is None:
-        module_options = [{"label": "No Course selected", "value": 0}]
-        return module_options
+    if len(course_start_dates) > 1:
+        print("More than one course start date found for this course, no durations")
+    if len(course_start_dates) != 1:
+        return pd.array([pd.NA] * len(completed_at), dtype="Int32")
 
-    # filter by the course selected
-    subset_data = data.copy()
-    selected_course = remove_special_characters(course_dict[val])
-    subset_data = subset_data[subset_data.course_name == selected_course]
+    return (completed_at - course_start_dates[0]).dt.days.astype("Int32").array
 
-    # Initialize dicts
-    module_dict = defaultdict(str)
 
-    for _, row in subset_data.iterrows():
-        module_dict[str(row["module_id"])] = re.sub(
-            r"^Module\s+\d+:\s+", "", row["module_name"]
-        )
+def build_course_cube(course_df):
+    """
+    Returns the progress cube of a course, the measures shared by the View Modules plots
 
-    if val != None:
-        module_options = [
-            {"label": module_name, "value": module_id}
-            for module_id, module_name in module_dict.items()
+    The cube holds one row per distinct student progress instead of one row per item:
+        progress: module_id, student_id, state and completed_at (day of completion)
+        completions: module_id, student_id, first completed_at and the whole days from
+            the course start date to it, for the completed modules
+
+    Parameters:
+        course_df (dataframe): rows of a single course
+
+    Returns:
+        cube (dict): progress and completions dataframes
+    """
+    progress = course_df[["module_id", "student_id", "state", "completed_at"]]
+    progress = progress.assign(
+        completed_at=progress["completed_at"].dt.normalize()
+    ).drop_duplicates(ignore_index=True)
+
+    course_start_dates = course_df["course_start_date"].dropna().unique()
+
+    completions = (
+        course_df[
+            (course_df["state"] == "completed") & course_df["completed_at"].notna()
         ]
+        .groupby(["module_id", "student_id"], observed=True)["completed_at"]
+        .min()
+        .reset_index()
+    )
+    completions["duration"] = get_durations(
+        completions["completed_at"], course_start_dates
+    )
 
-    def_value = module_options[0]["value"]
+    cube = {"progress": progress, "completions": completions}
 
-    return module_options, def_value
+    return cube
 
 
-# Update student-dropdown options
-@app.callback(
-    Output("student-dropdown-students-tab", "options"),
-    Output("student-dropdown-modules-tab", "options"),
-    Input("course-dropdown", "value"),
-)
-def update_student_dropdown_modules(val):
+def get_course_cube(course_id):
     """
-    Updates the student dropdown
+    Returns the progress cube of a course, built on first use and reused afterwards
 
     Parameters:
-        val (str): Selected Course
+        course_id (str): course_id
 
     Returns:
-        student_options (list): Student selection options
+        cube (dict): progress cube of the course, see build_course_cube
     """
+    course_id = str(course_id)
 
-    # Handling edge case
-    if val is None:
-        student_options = [{"label": "No Course selected", "value": 0}]
-        return student_options, student_options
+    if course_id not in course_cubes:
+        if backend == "sqlite":
+            course_cubes[course_id] = query_course_cube(course_id)
+        else:
+            course_cubes[course_id] = build_course_cube(get_course_data(course_id))
 
-    # filter by the course selected
-    subset_data = data.copy()
-    selected_course = remove_special_characters(course_dict[val])
-    subset_data = subset_data[subset_data.course_name == selected_course]
+    return course_cubes[course_id]
 
-    # Initialize dicts
-    global student_dict
-    student_dict = defaultdict(str)
 
-    for _, row in subset_data.iterrows():
-        student_dict[str(row["student_id"])] = row["student_name"]
+def get_cube_slice(course_id, table, selected_students="All", selected_modules=None):
+    """
+    Returns the rows of a progress cube table for the selected students and modules
 
-    if val != None:
-        student_options = [
-            {"label": student_name, "value": student_id}
-            for student_id, student_name in student_dict.items()
-        ]
+    Parameters:
+        course_id (str): course_id
+        table (str): one of "progress" or "completions"
+        selected_students (str): Selected Students, "All" for every student
+        selected_modules (list): Selected Modules, None for every module
 
-    # Add 'All' option in student_dict
-    student_dict["All"] = "All"
+    Returns:
+        cube_df (dataframe): selected rows of the table
+    """
+    cube_df = get_course_cube(course_id)[table]
+    mask = np.ones(len(cube_df), dtype=bool)
 
-    # Add the 'All' option at beginning of the list
-    student_options.insert(0, {"label": "All", "value": "All"})
+    if selected_students != "All":
+        mask &= id_mask(cube_df["student_id"], selected_students)
+    if selected_modules is not None:
+        mask &= id_mask(cube_df["module_id"], selected_modules)
 
-    return student_options, student_options
+    return cube_df[mask]
 
 
-# Filter the data based on user selections
-@app.callback(
-    Output("student-specific-data", "data"),
-    [
-        Input("course-dropdown", "value"),
-        Input("student-dropdown-students-tab", "value"),
-    ],
-)
-def update_student_filtered_data(selected_course, selected_students):
+def update_names(df, names=None):
     """
-    Returns a filtered dataset by selected course and selected students
+    Adds the names of the courses of df to course_dict
+
+    The names of the modules and items are kept in the lookup tables of every course,
+    see get_course_catalog.
 
     Parameters:
-        selected_course (str): Selected Course
-        selected_students (str): Selected Students
+        df (dataframe): passed pandas dataframe, None for the courses of the data manifest
+        names (dict): course names to update instead of course_dict
+    """
+    course_names = course_dict if names is None else names
+
+    # The courses of a data directory or database are named by their summaries
+    if df is None:
+        course_names.update(
+            (course_id, course["course_name"])
+            for course_id, course in course_files.items()
+        )
+        return
+
+    courses = df[["course_id", "course_name"]].drop_duplicates("course_id")
+    course_names.update(zip(courses["course_id"].astype(str), courses["course_name"]))
+
+
+def get_course_options():
+    """
+    Returns the course dropdown options
 
     Returns:
-        filtered_data (json): filtered data for storage
+        course_options (list): Course selection options
     """
+    course_options = [
+        {"label": course_name, "value": course_id}
+        for course_id, course_name in course_dict.items()
+    ]
 
-    # Filter the data based on user selections
-    if (
-        selected_students == "All"
-    ):  # don't need to filter by students, all are considered
-        filtered_df = data[(data["course_id"].astype(str) == selected_course)]
-    else:
-        filtered_df = data[
-            (data["course_id"].astype(str) == selected_course)
-            & (data["student_id"].astype(str) == selected_students)
-        ]
+    return course_options
 
-    # Convert the filtered DataFrame to JSON serializable format
-    filtered_data = filtered_df.to_json(date_format="iso", orient="split")
 
-    return filtered_data
+def get_course_catalog(course_id):
+    """
+    Returns the lookup tables of a course, built on first use and reused afterwards
 
+    Parameters:
+        course_id (str): course_id
 
-# filter the data based on user selections
-@app.callback(
-    Output("course-specific-data", "data"),
-    [
-        Input("course-dropdown", "value"),
-        Input("student-dropdown-modules-tab", "value"),
-        Input("module-checkboxes", "value"),
-    ],
-)
-def update_course_filtered_data(selected_course, selected_students, selected_modules):
+    Returns:
+        catalog (dict): lookup tables of the course, see get_catalog
     """
-    Returns a filtered dataset by selected course, selected students and selected modules
+    course_id = str(course_id)
+
+    if course_id not in course_catalogs:
+        course_catalogs[course_id] = get_catalog(get_course_data(course_id))
+
+    return course_catalogs[course_id]
+
+
+def get_student_name(course_id, student_id):
+    """
+    Returns the name of a student of a course, "All" for the selection of all students
 
     Parameters:
-        selected_course (str): Selected Course
-        selected_students (str): Selected Students
-        selected_students (list): Selected Modules
+        course_id (str): course_id
+        student_id (str): student_id or "All"
 
     Returns:
-        filtered_data (json): filtered data for storage
+        student_name (str): name of the student
     """
+    # Handling edge case
+    if student_id == "All":
+        return "All"
 
-    # Filter the DataFrame based on user selections
-    if (
-        selected_students == "All"
-    ):  # don't need to filter by students, all are considered
-        filtered_df = data[
-            (data["course_id"].astype(str) == selected_course)
-            & (data["module_id"].astype(str).isin(selected_modules))
-        ]
-    else:
-        filtered_df = data[
-            (data["course_id"].astype(str) == selected_course)
-            & (data["student_id"].astype(str) == selected_students)
-            & (data["module_id"].astype(str).isin(selected_modules))
-        ]
+    return get_course_catalog(course_id)["student_dict"].get(student_id)
 
-    # Convert the filtered DataFrame to JSON serializable format
-    filtered_data = filtered_df.to_json(date_format="iso", orient="split")
 
-    return filtered_data
+def id_mask(series, values):
+    """
+    Returns a boolean mask of the rows whose id is one of the selected values
 
+    The selected values are translated to the category codes of a categorical id column
+    once, the rows are then compared as integers instead of being converted to strings.
 
-# Filter the data based on user selections
-@app.callback(
-    Output("module-specific-data", "data"),
-    [
-        Input("course-dropdown", "value"),
-        Input("module-dropdown", "value"),
-        Input("item-checkboxes", "value"),
-    ],
-)
-def update_module_filtered_data(selected_course, selected_module, selected_items):
+    Parameters:
+        series (series): id column
+        values (str or list): selected id or ids
+
+    Returns:
+        mask (numpy.ndarray): boolean mask of the rows
     """
-    Returns a filtered dataset by selected course, selected students, selected modules and selected items
+    if values is None or isinstance(values, str):
+        values = [values]
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.categories.astype(str).get_indexer(values)
+        return np.isin(series.cat.codes.to_numpy(), codes[codes >= 0])
+
+    return series.astype(str).isin(values).to_numpy()
+
+
+def text_mask(series, predicate):
+    """
+    Returns a boolean mask of the rows whose text satisfies a predicate
+
+    The predicate is evaluated once per category of a categorical column, the rows are
+    then selected by their category codes instead of being converted to strings.
 
     Parameters:
-        selected_course (str): Selected Course
-        selected_module (str): Selected Modules
-        selected_items (list): Selected Items
+        series (series): text column
+        predicate (function): returns a boolean series of a series of strings
 
     Returns:
-        filtered_data (json): filtered data for storage
+        mask (numpy.ndarray): boolean mask of the rows
     """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = pd.Series(series.cat.categories.astype(str))
+        # The missing values, code -1, select the appended False
+        category_mask = np.append(predicate(categories).to_numpy(dtype=bool), False)
+        return category_mask[series.cat.codes.to_numpy()]
 
-    filtered_df = data[
-        (data["course_id"].astype(str) == selected_course)
-        & (data["module_id"].astype(str) == selected_module)
-        & (data["items_id"].astype(str).isin(selected_items))
-    ]
+    return predicate(series.astype(object).fillna("").astype(str)).to_numpy(dtype=bool)
 
-    # Convert the filtered DataFrame to JSON serializable format
-    filtered_data = filtered_df.to_json(date_format="iso", orient="split")
 
-    return filtered_data
+def value_mask(series, predicate):
+    """
+    Returns a boolean mask of the rows whose value satisfies a predicate
 
+    The predicate is evaluated once per category of a categorical column.
 
-# Plot 3, Timeline plot
-@app.callback(
-    Output("plot3", "figure"),
-    Output("export-button", "n_clicks", allow_duplicate=True),
-    [
-        Input("course-specific-data", "data"),
-        Input("date-slider", "start_date"),
-        Input("date-slider", "end_date"),
-        Input("course-dropdown", "value"),
-        Input("student-dropdown-modules-tab", "value"),
-        Input("export-button", "n_clicks"),
-        State("tabs", "value"),
-    ],
-    prevent_initial_call=True,
-)
-def update_timeline(
-    filtered_data,
-    start_date,
-    end_date,
-    course_selected,
-    student_selected,
-    n_clicks,
-    active_tab,
+    Parameters:
+        series (series): column
+        predicate (function): returns a bool of a value, None for a missing value
+
+    Returns:
+        mask (numpy.ndarray): boolean mask of the rows
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # The missing values, code -1, select the appended value of None
+        category_mask = np.array(
+            [predicate(value) for value in series.cat.categories] + [predicate(None)],
+            dtype=bool,
+        )
+        return category_mask[series.cat.codes.to_numpy()]
+
+    return np.fromiter(
+        (
+            predicate(None if pd.isna(value) else value)
+            for value in series.to_numpy(dtype=object)
+        ),
+        dtype=bool,
+        count=len(series),
+    )
+
+
+def is_prime(value):
+    """
+    Returns True if a value is a prime number
+
+    Parameters:
+        value (number): value
+
+    Returns:
+        prime (bool): True if the value is a prime integer
+    """
+    # Handling edge case
+    if not float(value).is_integer() or value < 2:
+        return False
+
+    number = int(value)
+    return all(number % divisor for divisor in range(2, int(number**0.5) + 1))
+
+
+def parse_filter_query(filter_query):
+    """
+    Returns the expression of a DataTable filter query
+
+    The query combines conditions with "&&" or "and", "||" or "or", "!" and
+    parentheses, e.g. '{module_name} contains "Week 1" && ({items_type} s= Quiz or
+    {items_type} is blank)'. An operator prefixed by "i" compares case insensitively,
+    "s" or no prefix case sensitively. An unquoted value ends where "and" or "or" are
+    followed by another condition, e.g. '{items_title} contains Rock and roll'.
+
+    Parameters:
+        filter_query (str): filter_query of the DataTable
+
+    Returns:
+        expression (tuple): expression tree of "or", "and", "not" and "condition"
+            nodes, see parse_filter_expression, None for an empty query
+
+    Raises:
+        ValueError: if the query can not be parsed
+    """
+    # Handling edge case
+    if not filter_query or not filter_query.strip():
+        return None
+
+    expression, position = parse_filter_expression(filter_query, 0, 0)
+
+    if filter_query[position:].strip():
+        raise ValueError(f"Invalid table filter: {filter_query[position:].strip()}")
+
+    return expression
+
+
+def parse_filter_expression(query, position, depth):
+    """
+    Parses the conditions joined by "or" and "and" of a filter query from position
+
+    Parameters:
+        query (str): filter_query of the DataTable
+        position (int): position of the expression in the query
+        depth (int): number of parentheses the expression is nested in
+
+    Returns:
+        expression (tuple): ("or", [("and", [term, ...]), ...]), see parse_filter_term
+        position (int): position after the expression
+    """
+    any_terms = []
+    while True:
+        all_terms = []
+        while True:
+            term, position = parse_filter_term(query, position, depth)
+            all_terms.append(term)
+
+            match = filter_and_pattern.match(query, position)
+            if match is None:
+                break
+            position = match.end()
+
+        any_terms.append(("and", all_terms))
+
+        match = filter_or_pattern.match(query, position)
+        if match is None:
+            return ("or", any_terms), position
+        position = match.end()
+
+
+def parse_filter_term(query, position, depth):
+    """
+    Parses a condition, a negated term or an expression in parentheses from position
+
+    Parameters:
+        query (str): filter_query of the DataTable
+        position (int): position of the term in the query
+        depth (int): number of parentheses the term is nested in
+
+    Returns:
+        term (tuple): ("not", term), an expression, or ("condition", column, operator,
+            value, case_sensitive) with a None value for the unary operators
+        position (int): position after the term
+    """
+    match = re.compile(r"\s*!(?!=)").match(query, position)
+    if match:
+        term, position = parse_filter_term(query, match.end(), depth)
+        return ("not", term), position
+
+    match = re.compile(r"\s*\(").match(query, position)
+    if match:
+        expression, position = parse_filter_expression(query, match.end(), depth + 1)
+        match = re.compile(r"\s*\)").match(query, position)
+        if match is None:
+            raise ValueError(f"Missing ) in the table filter: {query.strip()}")
+        return expression, match.end()
+
+    match = filter_column_pattern.match(query, position)
+    if match is None:
+        raise ValueError(f"Invalid table filter: {query[position:].strip()}")
+    column, position = match.group("column"), match.end()
+
+    match = filter_unary_pattern.match(query, position)
+    if match:
+        return ("condition", column, match.group("unary"), None, True), match.end()
+
+    match = filter_operator_pattern.match(query, position)
+    if match is None:
+        raise ValueError(f"Invalid table filter: {query[position:].strip()}")
+    if match.group("operator") is not None:
+        case, operator = match.group("case", "operator")
+    else:
+        case = match.group("symbol_case")
+        operator = filter_operators[match.group("symbol")]
+    position = match.end()
+
+    # A quoted value, or an unquoted value up to the next condition
+    match = filter_quoted_pattern.match(query, position) or filter_value_patterns[
+        depth > 0
+    ].match(query, position)
+    if match is None:
+        raise ValueError(f"Missing value in the table filter: {query.strip()}")
+    value = match.group("value")
+
+    # Remove the quotes and the escaping of a quoted value
+    if match.re is filter_quoted_pattern:
+        value = re.sub(r"\\(.)", r"\1", value[1:-1])
+
+    return ("condition", column, operator, value, case != "i"), match.end()
+
+
+def filter_mask(df, expression):
+    """
+    Returns a boolean mask of the rows of df that satisfy a filter expression
+
+    Parameters:
+        df (dataframe): rows of the table
+        expression (tuple): expression tree, see parse_filter_query
+
+    Returns:
+        mask (numpy.ndarray): boolean mask of the rows
+
+    Raises:
+        ValueError: if a condition is on a column that is not in df
+    """
+    kind = expression[0]
+
+    if kind == "or":
+        mask = np.zeros(len(df), dtype=bool)
+        for term in expression[1]:
+            mask |= filter_mask(df, term)
+        return mask
+
+    if kind == "and":
+        mask = np.ones(len(df), dtype=bool)
+        for term in expression[1]:
+            mask &= filter_mask(df, term)
+        return mask
+
+    if kind == "not":
+        return ~filter_mask(df, expression[1])
+
+    _, column, operator, value, case_sensitive = expression
+
+    # Handling edge case
+    if column not in df.columns:
+        raise ValueError(f"Unknown column in the table filter: {column}")
+
+    if operator in filter_unary_operators:
+        return value_mask(df[column], filter_unary_operators[operator])
+
+    # Numeric columns are compared as numbers when the value is a number
+    if (
+        pd.api.types.is_numeric_dtype(df[column])
+        and operator in filter_operators.values()
+    ):
+        try:
+            number = float(value)
+        except ValueError:
+            pass
+        else:
+            return getattr(df[column], operator)(number).to_numpy(dtype=bool)
+
+    if not case_sensitive:
+        value = value.lower()
+
+    def predicate(text):
+        if not case_sensitive:
+            text = text.str.lower()
+        if operator == "contains":
+            return text.str.contains(value, regex=False)
+        if operator == "datestartswith":
+            return text.str.startswith(value)
+        return getattr(text, operator)(value)
+
+    return text_mask(df[column], predicate)
+
+
+def filter_table(df, filter_query):
+    """
+    Returns the rows of df that satisfy a DataTable filter query
+
+    Parameters:
+        df (dataframe): rows of the table
+        filter_query (str): filter_query of the DataTable, see parse_filter_query
+
+    Returns:
+        filtered_df (dataframe): rows of the table that satisfy the query
+
+    Raises:
+        ValueError: if the query can not be parsed or is on an unknown column
+    """
+    expression = parse_filter_query(filter_query)
+
+    # Handling edge case
+    if expression is None:
+        return df
+
+    return df[filter_mask(df, expression)]
+
+
+def get_sort_key(column):
+    """
+    Returns the values a column of the table is sorted by
+
+    The categories of a categorical column are ranked by their text once, numeric and
+    datetime columns are sorted by their values and other columns by their text.
+
+    Parameters:
+        column (series): column of the table
+
+    Returns:
+        key (series): values to sort the rows by, missing values first
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        ranks = np.append(
+            column.cat.categories.astype(str).to_numpy().argsort().argsort(), -1
+        )
+        return pd.Series(ranks[column.cat.codes.to_numpy()], index=column.index)
+
+    if pd.api.types.is_numeric_dtype(column) or pd.api.types.is_datetime64_any_dtype(
+        column
+    ):
+        return column
+
+    return column.fillna("").astype(str)
+
+
+def sort_table(df, sort_by):
+    """
+    Returns the rows of df sorted as in the sort_by of a DataTable
+
+    Parameters:
+        df (dataframe): rows of the table
+        sort_by (list): sort_by of the DataTable, dictionaries of column_id and direction
+
+    Returns:
+        sorted_df (dataframe): sorted rows of the table
+    """
+    sort_by = [column for column in sort_by or [] if column["column_id"] in df.columns]
+
+    # Handling edge case
+    if not sort_by:
+        return df
+
+    return df.sort_values(
+        [column["column_id"] for column in sort_by],
+        ascending=[column["direction"] == "asc" for column in sort_by],
+        key=get_sort_key,
+        kind="stable",
+    )
+
+
+def get_course_data(course_id):
+    """
+    Returns the rows of a single course using the course partition index
+
+    Parameters:
+        course_id (str): course_id
+
+    Returns:
+        course_df (dataframe): rows of the course, empty if the course is unknown
+    """
+    # Handling edge case
+    if data_shards:
+        return get_course_shard(course_id)
+    if backend == "sqlite":
+        return query_module_data(course_id)
+
+    # The data and its index are read together, refresh_data replaces them together
+    df, index = indexed_data
+    rows = index.get(str(course_id))
+
+    # Handling edge case
+    if rows is None:
+        return df.iloc[0:0]
+
+    return df.take(rows)
+
+
+def get_course_shard(course_id):
+    """
+    Returns the rows of a single course from its data file, loaded on first use
+
+    The rows of the most recently selected courses are kept in course_frames, within its
+    memory budget. The lookup tables and progress cube of an evicted course are discarded
+    with its rows.
+
+    Parameters:
+        course_id (str): course_id
+
+    Returns:
+        course_df (dataframe): rows of the course, empty if the course is unknown
+    """
+    course_id = str(course_id)
+
+    course_df = course_frames.get(course_id)
+    if course_df is not None:
+        return course_df
+
+    course = course_files.get(course_id)
+
+    # Handling edge case
+    if course is None:
+        return pd.DataFrame(columns=list(column_dtypes))
+
+    course_df = load_module_data(os.path.join(data_path, course["file"]))
+    if len(course_files_of(course["file"])) > 1:
+        course_df = course_df[course_df["course_id"] == course_id].reset_index(
+            drop=True
+        )
+
+    course_frames.put(
+        course_id, course_df, int(course_df.memory_usage(deep=True).sum())
+    )
+
+    return course_df
+
+
+def course_files_of(name):
+    """
+    Returns the course_ids of a data file
+
+    Parameters:
+        name (str): file name in the data directory
+
+    Returns:
+        course_ids (list): course_ids of the file
+    """
+    return [
+        course_id
+        for course_id, course in course_files.items()
+        if course["file"] == name
+    ]
+
+
+def evict_course(course_id, course_df):
+    """
+    Discards the lookup tables and progress cube of a course evicted from course_frames
+
+    Parameters:
+        course_id (str): course_id
+        course_df (dataframe): rows of the course
+    """
+    course_catalogs.pop(course_id, None)
+    course_cubes.pop(course_id, None)
+
+
+def get_course_ids():
+    """
+    Returns the course_ids of the data
+
+    Returns:
+        course_ids (list): sorted course_ids
+    """
+    return sorted(course_index if data is not None else course_files)
+
+
+def get_date_range():
+    """
+    Returns the first and last completion dates of the data
+
+    Returns:
+        first_date, last_date (datetime.date): first and last completion dates
+    """
+    if data is not None:
+        return data["completed_at"].min().date(), data["completed_at"].max().date()
+
+    first_dates = [c["first_date"] for c in course_files.values() if c["first_date"]]
+    last_dates = [c["last_date"] for c in course_files.values() if c["last_date"]]
+
+    # Handling edge case
+    if not first_dates:
+        today = datetime.date.today()
+        return today, today
+
+    return (
+        datetime.date.fromisoformat(min(first_dates)),
+        datetime.date.fromisoformat(max(last_dates)),
+    )
+
+
+def filter_student_data(selected_course, selected_students):
+    """
+    Returns the data filtered by selected course and selected students
+
+    Parameters:
+        selected_course (str): Selected Course
+        selected_students (str): Selected Students
+
+    Returns:
+        filtered_df (dataframe): filtered data
+    """
+    # The database selects the rows
+    if backend == "sqlite":
+        return query_module_data(selected_course, student_id=selected_students)
+
+    course_df = get_course_data(selected_course)
+
+    # Filter the data based on user selections
+    if (
+        selected_students == "All"
+    ):  # don't need to filter by students, all are considered
+        filtered_df = course_df
+    else:
+        filtered_df = course_df[id_mask(course_df["student_id"], selected_students)]
+
+    return filtered_df
+
+
+def filter_course_data(selected_course, selected_students, selected_modules):
+    """
+    Returns the data filtered by selected course, selected students and selected modules
+
+    Parameters:
+        selected_course (str): Selected Course
+        selected_students (str): Selected Students
+        selected_modules (list): Selected Modules
+
+    Returns:
+        filtered_df (dataframe): filtered data
+    """
+    # The database selects the rows
+    if backend == "sqlite":
+        return query_module_data(
+            selected_course, student_id=selected_students, module_id=selected_modules
+        )
+
+    course_df = get_course_data(selected_course)
+
+    # Filter the DataFrame based on user selections
+    if (
+        selected_students == "All"
+    ):  # don't need to filter by students, all are considered
+        filtered_df = course_df[id_mask(course_df["module_id"], selected_modules)]
+    else:
+        filtered_df = course_df[
+            id_mask(course_df["student_id"], selected_students)
+            & id_mask(course_df["module_id"], selected_modules)
+        ]
+
+    return filtered_df
+
+
+def filter_module_data(selected_course, selected_module, selected_items):
+    """
+    Returns the data filtered by selected course, selected module and selected items
+
+    Parameters:
+        selected_course (str): Selected Course
+        selected_module (str): Selected Module
+        selected_items (list): Selected Items
+
+    Returns:
+        filtered_df (dataframe): filtered data
+    """
+    # The database selects the rows
+    if backend == "sqlite":
+        return query_module_data(
+            selected_course, module_id=selected_module, items_id=selected_items
+        )
+
+    course_df = get_course_data(selected_course)
+
+    filtered_df = course_df[
+        id_mask(course_df["module_id"], selected_module)
+        & id_mask(course_df["items_id"], selected_items)
+    ]
+
+    return filtered_df
+
+
+def encode_frame(df, codec):
+    """
+    Encodes a dataframe as a string for storage
+
+    Parameters:
+        df (dataframe): passed pandas dataframe
+        codec (str): "json", or the binary "arrow" (Arrow IPC) and "parquet" formats
+
+    Returns:
+        encoded (str): JSON string, or base64 string of the binary formats
+    """
+    if codec == "json":
+        return df.to_json(date_format="iso", orient="split")
+
+    # The Arrow schema keeps the dtypes, including the categorical columns
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+
+    if codec == "arrow":
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, sink)
+
+    return base64.b64encode(sink.getvalue().to_pybytes()).decode("ascii")
+
+
+def decode_frame(encoded, codec):
+    """
+    Decodes a dataframe encoded by encode_frame
+
+    Parameters:
+        encoded (str): encoded dataframe
+        codec (str): codec used by encode_frame
+
+    Returns:
+        df (dataframe): decoded dataframe
+    """
+    if codec == "json":
+        return pd.read_json(encoded, orient="split")
+
+    buffer = pa.py_buffer(base64.b64decode(encoded))
+
+    if codec == "arrow":
+        table = pa.ipc.open_stream(buffer).read_all()
+    else:
+        table = pq.read_table(pa.BufferReader(buffer))
+
+    return table.to_pandas()
+
+
+def get_store_key(kind, selection):
+    """
+    Returns the key of the filtered data of a selection in the server cache
+
+    Parameters:
+        kind (str): one of "student", "course" or "module", see store_filters
+        selection (list): user selections, the selected course first
+
+    Returns:
+        key (str): hexadecimal key
+    """
+    version = course_versions.get(str(selection[0]), 0)
+
+    return hashlib.sha1(json.dumps([kind, selection, version]).encode()).hexdigest()
+
+
+def get_figure_key(plot, selection, *options):
+    """
+    Returns the key of the figure of a selection in the figure cache
+
+    The selected students, modules and items are sorted, the same sets selected in
+    another order share their figure.
+
+    Parameters:
+        plot (str): id of the plot
+        selection (list): user selections of the store, the selected course first
+        options: the other inputs of the figure, such as the status or the date range
+
+    Returns:
+        key (str): hexadecimal key
+    """
+    selection = [
+        sorted(value) if isinstance(value, list) else value for value in selection
+    ]
+    version = course_versions.get(str(selection[0]), 0)
+
+    return hashlib.sha1(
+        json.dumps([plot, selection, list(options), version]).encode()
+    ).hexdigest()
+
+
+def to_store(kind, selection):
+    """
+    Returns the dcc.Store payload of a user selection
+
+    In the "server" store mode the filtered data stays in the server process and the
+    payload only carries a key, the data is filtered when it is first needed. In the
+    other store modes the payload carries the columns of the filtered data used by the
+    plots, encoded with the store mode as codec. The View Modules plots read the course
+    progress cube, the "course" payload only carries the selection.
+
+    Parameters:
+        kind (str): one of "student", "course" or "module", see store_filters
+        selection (list): user selections the data is filtered by
+
+    Returns:
+        payload (dict): JSON serializable payload for storage
+    """
+    version = course_versions.get(str(selection[0]), 0)
+    payload = {"kind": kind, "selection": selection, "version": version}
+
+    if kind not in store_columns:
+        return payload
+
+    if store_mode == "server":
+        payload["key"] = get_store_key(kind, selection)
+    else:
+        filtered_df = store_filters[kind](*selection)
+        payload["codec"] = store_mode
+        payload["data"] = encode_frame(filtered_df[store_columns[kind]], store_mode)
+
+    return payload
+
+
+def is_stored(payload, kind, selection):
+    """
+    Returns True if a dcc.Store payload already holds the data of a selection
+
+    The payload of a hidden tab is kept while its tab is hidden, and is only created
+    again when the tab is shown if the selection or the data of the course changed.
+
+    Parameters:
+        payload (dict): current payload of the store, None before the first update
+        kind (str): one of "student", "course" or "module", see store_filters
+        selection (list): user selections the data is filtered by
+
+    Returns:
+        stored (bool): True if the payload is up to date
+    """
+    # Handling edge case
+    if payload is None:
+        return False
+
+    return (
+        payload.get("kind") == kind
+        and payload.get("selection") == selection
+        and payload.get("version") == course_versions.get(str(selection[0]), 0)
+    )
+
+
+def from_store(payload):
+    """
+    Returns the filtered dataset of a dcc.Store payload
+
+    The data of a key is filtered when it is not in the server cache, on first use or
+    when it was evicted.
+
+    Parameters:
+        payload (dict): payload created by to_store
+
+    Returns:
+        filtered_df (dataframe): filtered data
+    """
+    if "key" not in payload:
+        return decode_frame(payload["data"], payload.get("codec", "json"))
+
+    # The key is derived again, as the data of the course may have changed since
+    key = get_store_key(payload["kind"], payload["selection"])
+    filtered_df = frame_cache.get(key)
+
+    if filtered_df is None:
+        filtered_df = store_filters[payload["kind"]](*payload["selection"])
+        frame_cache.put(
+            key, filtered_df, int(filtered_df.memory_usage(deep=True).sum())
+        )
+
+    return filtered_df
+
+
+def index_courses(df, offset=0):
+    """
+    Returns the row positions of every course in df
+
+    Parameters:
+        df (dataframe): passed pandas dataframe
+        offset (int): position of the first row of df in the data
+
+    Returns:
+        course_index (dict): row positions keyed by course_id (str)
+    """
+    return {
+        str(course_id): rows + offset
+        for course_id, rows in df.groupby("course_id", observed=True).indices.items()
+    }
+
+
+def invalidate_course(course_id):
+    """
+    Discards the lookup tables and cached data of a course whose rows changed
+
+    Parameters:
+        course_id (str): course_id
+    """
+    course_versions[course_id] = course_versions.get(course_id, 0) + 1
+    course_catalogs.pop(course_id, None)
+    course_cubes.pop(course_id, None)
+    course_frames.discard(course_id)
+
+
+def refresh_data():
+    """
+    Merges the rows written to the data file since it was last read into the data
+
+    When rows were appended to the file only the new rows are read and appended to the
+    data, and only the courses of these rows are invalidated. A file that was otherwise
+    changed is read again and all courses are invalidated.
+
+    Returns:
+        summary (dict): mode ("unchanged", "append" or "reload"), number of rows read and
+            the course_ids whose rows changed
+    """
+    global data, course_index, indexed_data, data_file
+    global course_dict
+
+    # Handling edge case
+    if data_shards:
+        return refresh_manifest()
+    if backend == "sqlite":
+        return refresh_sql_database()
+
+    with data_lock:
+        state = get_file_state(data_path)
+        if state["size"] == data_file["size"] and state["mtime"] == data_file["mtime"]:
+            return {"mode": "unchanged", "rows": 0, "courses": []}
+
+        new_rows = None
+        if state["size"] > data_file["size"]:
+            with open(data_path, "rb") as file:
+                # The file was appended to when its previous content is unchanged
+                if get_file_digest(file, data_file["size"]) == data_file["digest"]:
+                    file.seek(0)
+                    header = file.readline()
+                    file.seek(data_file["size"])
+
+                    # Only the complete rows are read, a row being written is read later
+                    appended = file.read(state["size"] - data_file["size"])
+                    appended = appended[: appended.rfind(b"\n") + 1]
+
+                    # Handling edge case
+                    if not appended:
+                        return {"mode": "unchanged", "rows": 0, "courses": []}
+
+                    try:
+                        new_rows = read_module_data(io.BytesIO(header + appended))
+                    except (ValueError, pd.errors.ParserError):
+                        new_rows = None
+                    else:
+                        # The file is recorded up to the last row read
+                        size = data_file["size"] + len(appended)
+                        state = {
+                            "size": size,
+                            "mtime": state["mtime"],
+                            "digest": get_file_digest(file, size),
+                        }
+
+        if new_rows is None:
+            new_data = load_module_data(data_path)
+            changed = set(course_index) | set(new_data["course_id"].astype(str))
+
+            # The names are replaced at once, the callbacks never see them empty
+            names = defaultdict(str)
+            update_names(new_data, names)
+            course_dict = names
+
+            new_index = index_courses(new_data)
+            data, course_index = new_data, new_index
+            indexed_data = (data, course_index)
+            mode, rows_read = "reload", len(data)
+        else:
+            offset = len(data)
+            new_index = dict(course_index)
+            for course_id, rows in index_courses(new_rows, offset).items():
+                if course_id in new_index:
+                    rows = np.concatenate([new_index[course_id], rows])
+                new_index[course_id] = rows
+            changed = set(new_rows["course_id"].astype(str))
+            update_names(new_rows)
+            rows_read = len(new_rows)
+
+            # concat_module_data pops the columns of the frames, not of the live data
+            data = concat_module_data([data.copy(deep=False), new_rows])
+            course_index = new_index
+            indexed_data = (data, course_index)
+            mode = "append"
+
+        data_file = state
+        for course_id in changed:
+            invalidate_course(course_id)
+
+    return {"mode": mode, "rows": rows_read, "courses": sorted(changed)}
+
+
+def refresh_manifest():
+    """
+    Updates the manifest of the data directory and invalidates the courses of the files
+    added, changed or removed since it was last read
+
+    Returns:
+        summary (dict): mode ("unchanged" or "manifest"), number of rows of the changed
+            courses and the course_ids whose rows changed
+    """
+    global data_manifest, course_files, course_dict
+
+    with data_lock:
+        new_manifest = load_manifest(data_path)
+
+        changed = set()
+        for name in set(data_manifest) | set(new_manifest):
+            old_entry = data_manifest.get(name, {"courses": {}})
+            new_entry = new_manifest.get(name, {"courses": {}})
+            if old_entry != new_entry:
+                changed |= set(old_entry["courses"]) | set(new_entry["courses"])
+
+        # Handling edge case
+        if not changed:
+            return {"mode": "unchanged", "rows": 0, "courses": []}
+
+        data_manifest = new_manifest
+        course_files = get_course_files(data_manifest)
+
+        # The course names are replaced at once, the callbacks never see them empty
+        names = defaultdict(str)
+        update_names(None, names)
+        course_dict = names
+        for course_id in changed:
+            invalidate_course(course_id)
+
+    rows = sum(course_files[c]["rows"] for c in changed if c in course_files)
+
+    return {"mode": "manifest", "rows": rows, "courses": sorted(changed)}
+
+
+def refresh_sql_database():
+    """
+    Writes the database again when the data file changed and invalidates all the courses
+
+    Returns:
+        summary (dict): mode ("unchanged" or "reload"), number of rows and the course_ids
+            whose rows changed
+    """
+    global data_file, course_files, sql_version, course_dict
+
+    with data_lock:
+        state = get_file_state(data_path)
+        if state["size"] == data_file["size"] and state["mtime"] == data_file["mtime"]:
+            return {"mode": "unchanged", "rows": 0, "courses": []}
+
+        load_sql_database(data_path)
+        sql_version += 1
+
+        changed = set(course_files)
+        course_files = query_course_summaries()
+        changed |= set(course_files)
+
+        # The course names are replaced at once, the callbacks never see them empty
+        names = defaultdict(str)
+        update_names(None, names)
+        course_dict = names
+        data_file = state
+        for course_id in changed:
+            invalidate_course(course_id)
+
+    rows = sum(course["rows"] for course in course_files.values())
+
+    return {"mode": "reload", "rows": rows, "courses": sorted(changed)}
+
+
+def watch_data(interval):
+    """
+    Refreshes the data every 'interval' seconds, run in a background thread
+
+    Parameters:
+        interval (float): seconds between two checks of the data file
+    """
+    while True:
+        time.sleep(interval)
+        try:
+            refresh_data()
+        except Exception as error:
+            print(f"Could not refresh the data from {data_path}: {error}")
+
+
+def start_watcher(interval=None):
+    """
+    Starts the background thread that refreshes the data, see watch_data
+
+    Parameters:
+        interval (float): seconds between two checks of the data file, defaults to
+            watch_interval
+
+    Returns:
+        watcher (Thread): the started thread
+    """
+    watcher = threading.Thread(
+        target=watch_data, args=(interval or watch_interval,), daemon=True
+    )
+    watcher.start()
+
+    return watcher
+
+
+def preload_data():
+    """
+    Builds the lookup tables and progress cubes of every course, then freezes them
+
+    Called once before the server forks its workers, the workers then share the data,
+    lookup tables and cubes copy-on-write instead of each building their own. The frozen
+    objects are left out of the garbage collection, which would otherwise write to, and
+    so copy, their memory pages in every worker.
+
+    Returns:
+        courses (int): number of courses preloaded
+    """
+    course_ids = get_course_ids()
+    for course_id in course_ids:
+        get_course_catalog(course_id)
+        get_course_cube(course_id)
+
+    gc.collect()
+    gc.freeze()
+
+    return len(course_ids)
+
+
+def submit_export(images):
+    """
+    Queues the images to be written by the export workers, off the callbacks
+
+    Parameters:
+        images (list): (figure dict, image path) pairs
+
+    Returns:
+        job_id (str): id of the export job, see get_export_status
+    """
+    job_id = uuid.uuid4().hex
+    export_jobs.put(
+        job_id,
+        {
+            "status": "queued",
+            "files": [path for _, path in images],
+            "error": None,
+            "submitted": time.time(),
+        },
+    )
+    export_executor.submit(run_export, job_id, images)
+
+    return job_id
+
+
+def run_export(job_id, images):
+    """
+    Writes the images of an export job, run by the export workers
+
+    Parameters:
+        job_id (str): id of the export job
+        images (list): (figure dict, image path) pairs
+    """
+    job = export_jobs.get(job_id) or {}
+    job["status"] = "running"
+
+    try:
+        for folder in {os.path.dirname(path) for _, path in images}:
+            os.makedirs(folder, exist_ok=True)
+        for figure, path in images:
+            start = time.perf_counter()
+            try:
+                pio.write_image(figure, path)
+            except Exception:
+                record_export(time.perf_counter() - start, True)
+                raise
+            record_export(time.perf_counter() - start, False)
+        job["status"] = "done"
+    except Exception as error:
+        job["status"] = "failed"
+        job["error"] = str(error)
+        print(f"Could not export the plots: {error}")
+
+    job["duration"] = time.time() - job.get("submitted", time.time())
+
+
+def get_export_status(job_id):
+    """
+    Returns the status of an export job
+
+    Parameters:
+        job_id (str): id of the export job
+
+    Returns:
+        job (dict): status ("queued", "running", "done", "failed" or "unknown"), files
+            and error of the job
+    """
+    job = export_jobs.get(job_id)
+
+    # Handling edge case
+    if job is None:
+        return {"status": "unknown", "files": [], "error": None}
+
+    return dict(job)
+
+
+def record_callback(name, seconds, request_bytes, response_bytes, status):
+    """
+    Adds a callback request to the callback metrics
+
+    Parameters:
+        name (str): name of the callback function
+        seconds (float): time to respond
+        request_bytes (int): size of the request, with the Store data sent as input or state
+        response_bytes (int): size of the response, with the Store data written
+        status (int): HTTP status of the response
+    """
+    with metrics_lock:
+        metrics = callback_metrics[name]
+        metrics["count"] += 1
+        metrics["errors"] += status >= 500
+        metrics["seconds"] += seconds
+        metrics["buckets"][np.searchsorted(latency_buckets, seconds)] += 1
+        metrics["request_bytes"] += request_bytes
+        metrics["response_bytes"] += response_bytes
+
+
+def record_export(seconds, failed):
+    """
+    Adds a rendered image to the export metrics
+
+    Parameters:
+        seconds (float): time to render and write the image
+        failed (bool): whether the image could not be written
+    """
+    with metrics_lock:
+        export_metrics["count"] += 1
+        export_metrics["errors"] += failed
+        export_metrics["seconds"] += seconds
+        export_metrics["buckets"][np.searchsorted(latency_buckets, seconds)] += 1
+
+
+def escape_label(value):
+    """
+    Returns a label value escaped as in the Prometheus text format
+
+    Parameters:
+        value (str): label value
+
+    Returns:
+        escaped (str): value with backslashes, double quotes and line feeds escaped
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_histogram(name, labels, metrics):
+    """
+    Returns the lines of a Prometheus histogram
+
+    Parameters:
+        name (str): metric name
+        labels (str): labels of the series, e.g. 'callback="update_timeline"', or ""
+        metrics (dict): count, seconds and buckets (count per bucket, not cumulative)
+
+    Returns:
+        lines (list): lines of the exposition format
+    """
+    lines = []
+    cumulative = 0
+    for bound, count in zip(latency_buckets + ["+Inf"], metrics["buckets"]):
+        cumulative += count
+        bucket_labels = ",".join(filter(None, [labels, f'le="{bound}"']))
+        lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+
+    series = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{series} {metrics['seconds']}")
+    lines.append(f"{name}_count{series} {metrics['count']}")
+
+    return lines
+
+
+def get_metrics_text():
+    """
+    Returns the callback, export and cache metrics in the Prometheus text format
+
+    Returns:
+        text (str): metrics
+    """
+    with metrics_lock:
+        callbacks = {name: dict(metrics) for name, metrics in callback_metrics.items()}
+        exports = dict(export_metrics)
+
+    lines = [
+        "# HELP dashboard_callback_seconds Time to respond to a callback request",
+        "# TYPE dashboard_callback_seconds histogram",
+    ]
+    for name, metrics in sorted(callbacks.items()):
+        lines += format_histogram(
+            "dashboard_callback_seconds", f'callback="{escape_label(name)}"', metrics
+        )
+
+    for metric, key, help_text in [
+        ("dashboard_callback_errors_total", "errors", "Callback requests that failed"),
+        (
+            "dashboard_callback_request_bytes_total",
+            "request_bytes",
+            "Size of the callback requests, with the Store data sent",
+        ),
+        (
+            "dashboard_callback_response_bytes_total",
+            "response_bytes",
+            "Size of the callback responses, with the Store data written",
+        ),
+    ]:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        lines += [
+            f'{metric}{{callback="{escape_label(name)}"}} {metrics[key]}'
+            for name, metrics in sorted(callbacks.items())
+        ]
+
+    lines += [
+        "# HELP dashboard_export_seconds Time to render and write a plot image",
+        "# TYPE dashboard_export_seconds histogram",
+    ]
+    lines += format_histogram("dashboard_export_seconds", "", exports)
+    lines += [
+        "# HELP dashboard_export_errors_total Plot images that could not be written",
+        "# TYPE dashboard_export_errors_total counter",
+        f"dashboard_export_errors_total {exports['errors']}",
+    ]
+
+    lines += [
+        "# HELP dashboard_cache_requests_total Lookups of the caches by result",
+        "# TYPE dashboard_cache_requests_total counter",
+    ]
+    for name, cache in [
+        ("frame", frame_cache),
+        ("figure", figure_cache),
+        ("course", course_frames),
+    ]:
+        lines.append(
+            f'dashboard_cache_requests_total{{cache="{name}",result="hit"}} {cache.hits}'
+        )
+        lines.append(
+            f'dashboard_cache_requests_total{{cache="{name}",result="miss"}} {cache.misses}'
+        )
+
+    return "\n".join(lines) + "\n"
+
+
+def get_item_completion(df):
+    """
+    Returns the completion of every item in df, computed in a single grouped pass
+
+    Parameters:
+        df (dataframe): passed pandas dataframe
+
+    Returns:
+        item_completion (dataframe): indexed by items_id (str) in order of appearance, with
+            required (whether the item has a completion requirement), students (total
+            students) and completed_students (students who completed the requirement)
+    """
+    flags = df[["items_id", "student_id"]].assign(
+        required=df["item_cp_req_type"].notna().to_numpy(),
+        completed_student_id=df["student_id"].where(
+            (df["item_cp_req_completed"] == 1).to_numpy()
+        ),
+    )
+    grouped = flags.groupby("items_id", observed=True, sort=False)
+
+    item_completion = pd.DataFrame(
+        {
+            "required": grouped["required"].any(),
+            "students": grouped["student_id"].nunique(),
+            "completed_students": grouped["completed_student_id"].nunique(),
+        }
+    )
+    item_completion.index = item_completion.index.astype(str)
+
+    return item_completion
+
+
+def get_state_percentages(df, states=None):
+    """
+    Returns the percentage of students in each state for every module, computed in a single pass
+
+    Parameters:
+        df (dataframe): passed pandas dataframe
+        states (list): module states to report, defaults to module_status
+
+    Returns:
+        percentages (dataframe): percentages indexed by module_id (str), one column per state
+    """
+    if states is None:
+        states = module_status
+
+    # Distinct students for every module and state
+    pairs = df[["module_id", "state", "student_id"]].drop_duplicates()
+    counts = pairs.groupby(["module_id", "state"], observed=True, sort=False).size()
+    counts = counts.unstack(fill_value=0)
+    counts.columns = counts.columns.astype(str)
+
+    # Total students who are/will work on each module
+    totals = df.groupby("module_id", observed=True, sort=False)["student_id"].nunique()
+
+    percentages = counts.reindex(index=totals.index, columns=states, fill_value=0).div(
+        totals, axis=0
+    )
+    percentages.index = percentages.index.astype(str)
+
+    return percentages
+
+
+def get_completion_timeline(df, start_date=None, end_date=None):
+    """
+    Returns the cumulative completion percentage of every module on each of its completion dates
+
+    Parameters:
+        df (dataframe): passed pandas dataframe
+        start_date (datetime.date): first date of the timeline, not bounded when None
+        end_date (datetime.date): last date of the timeline, not bounded when None
+
+    Returns:
+        timeline (dataframe): module_id (str), Date (datetime.date) and Percentage Completion,
+            sorted by Date
+    """
+    # Total students who are/will work on each module
+    totals = df.groupby("module_id", observed=True)["student_id"].nunique()
+
+    # The completion dates of a module are the points of its timeline
+    dated = df.loc[
+        df["completed_at"].notna(), ["module_id", "state", "student_id", "completed_at"]
+    ]
+    dated = dated.assign(Date=dated["completed_at"].dt.normalize())
+    timeline = dated[["module_id", "Date"]].drop_duplicates()
+
+    # Count each student once, on the date of their first completion of the module
+    first_completions = (
+        dated[dated["state"] == "completed"]
+        .groupby(["module_id", "student_id"], observed=True)["Date"]
+        .min()
+        .reset_index()
+        .groupby(["module_id", "Date"], observed=True)
+        .size()
+        .rename("completions")
+        .reset_index()
+    )
+
+    # Running total of completions along the dates of each module
+    timeline = timeline.merge(first_completions, on=["module_id", "Date"], how="left")
+    timeline = timeline.sort_values(["module_id", "Date"], ignore_index=True)
+    completed = (
+        timeline["completions"]
+        .fillna(0)
+        .groupby(timeline["module_id"], observed=True)
+        .cumsum()
+    )
+    timeline["Percentage Completion"] = (
+        completed / totals.reindex(timeline["module_id"]).to_numpy() * 100
+    )
+
+    # Clip to the date range with a binary search on the sorted dates
+    timeline = timeline.sort_values("Date", kind="stable", ignore_index=True)
+    lo, hi = 0, len(timeline)
+    if start_date is not None:
+        lo = timeline["Date"].searchsorted(pd.Timestamp(start_date), side="left")
+    if end_date is not None:
+        hi = timeline["Date"].searchsorted(pd.Timestamp(end_date), side="right")
+    timeline = timeline.iloc[lo:hi]
+
+    return pd.DataFrame(
+        {
+            "module_id": timeline["module_id"].astype(str).to_numpy(),
+            "Date": timeline["Date"].dt.date.to_numpy(),
+            "Percentage Completion": timeline["Percentage Completion"].to_numpy(),
+        }
+    )
+
+
+def get_duration_statistics(df):
+    """
+    Returns the mean, median and quartiles of the days to complete every module, in one grouped pass
+
+    Parameters:
+        df (dataframe): completions with module_id and duration columns
+
+    Returns:
+        statistics (dataframe): module_id, duration (mean), median, p25 and p75
+    """
+    durations = df["duration"].astype(float).groupby(df["module_id"], observed=True)
+
+    statistics = durations.agg(["mean", "median"])
+    quartiles = durations.quantile([0.25, 0.75]).unstack().reindex(columns=[0.25, 0.75])
+    statistics["p25"] = quartiles[0.25]
+    statistics["p75"] = quartiles[0.75]
+
+    return statistics.rename(columns={"mean": "duration"}).reset_index()
+
+
+# ---------------------------------------------------
+# reading the data
+
+# Columns used by the dashboard, with the data types they are read as.
+# The type of the completion status is inferred, it is converted to float after reading.
+column_dtypes = {
+    "completed_at": "object",
+    "course_id": "category",
+    "module_id": "category",
+    "module_name": "category",
+    "state": "category",
+    "student_id": "category",
+    "student_name": "category",
+    "items_id": "category",
+    "items_title": "category",
+    "items_position": "Int64",
+    "items_type": "category",
+    "item_cp_req_type": "category",
+    "item_cp_req_completed": None,
+    "course_name": "category",
+    "course_start_date": "category",
+}
+
+# Version of the parsed data cache, bumped when the conversions after reading change
+data_cache_version = 2
+
+categorical_cols = [
+    col for col, dtype in column_dtypes.items() if dtype == "category"
+] + ["item_cp_req_completed"]
+
+# Rows read at a time from the csv
+data_chunksize = int(os.environ.get("DASHBOARD_CHUNK_SIZE", 100000))
+
+# Location of the module progress data, a csv or a directory of csv files (e.g. one per
+# course), the parsed data cache is kept next to every csv
+data_path = os.environ.get("DASHBOARD_DATA_PATH", "data/module_data.csv")
+
+# The files of a directory are listed in a manifest, the rows of a course are read on
+# first selection of the course, see get_course_shard
+data_shards = os.path.isdir(data_path)
+
+# "pandas" filters and aggregates the data loaded in memory, "sqlite" queries an indexed
+# database written next to the csv instead, so a course query only reads its rows
+backend = os.environ.get("DASHBOARD_BACKEND", "pandas")
+
+if backend == "sqlite" and data_shards:
+    print("The sqlite backend needs a csv data path, using the pandas backend")
+    backend = "pandas"
+
+# Connection of every thread to the database, and number of times it was written again
+sql_connections = threading.local()
+sql_version = 0
+
+if data_shards:
+    data_manifest = load_manifest(data_path)
+    course_files = get_course_files(data_manifest)
+    data, data_file, course_index = None, None, {}
+elif backend == "sqlite":
+    sql_path = load_sql_database(data_path)
+    course_files = query_course_summaries()
+    data, data_file, course_index = None, get_file_state(data_path), {}
+else:
+    data = load_module_data(data_path)
+
+    # Size, modification time and digest of the data file when it was read
+    data_file = get_file_state(data_path)
+
+    # Partition the rows by course once, the callbacks then only touch the rows of the selected course
+    course_index = index_courses(data)
+
+# The data and its index, swapped together when the data is refreshed, see get_course_data
+indexed_data = (data, course_index)
+
+# Serializes the refreshes of the data
+data_lock = threading.Lock()
+
+# Seconds between two checks of the data file for new rows, 0 disables the checks
+watch_interval = float(os.environ.get("DASHBOARD_WATCH_INTERVAL", 0))
+
+# Token of the /reload requests, without it only local requests can reload the data
+reload_token = os.environ.get("DASHBOARD_RELOAD_TOKEN", "")
+
+
+############################
+#  Defining vairables      #
+############################
+
+module_status = ["completed", "started", "unlocked", "locked"]
+
+# dcc.Store mode, "server" keeps the filtered data in this process and stores a key,
+# "json", "arrow" and "parquet" store the filtered data itself in that format
+store_mode = os.environ.get("DASHBOARD_STORE_MODE", "server")
+
+if store_mode in ["arrow", "parquet"] and pa is None:
+    print(f"The {store_mode} store mode needs pyarrow, using the json store mode")
+    store_mode = "json"
+
+# Rows of the View Students table sent to the browser at a time
+table_page_size = int(os.environ.get("DASHBOARD_TABLE_PAGE_SIZE", 15))
+
+# Operators of the DataTable filter queries, the symbols and their pandas comparisons
+filter_operators = {
+    ">=": "ge",
+    "<=": "le",
+    "<": "lt",
+    ">": "gt",
+    "!=": "ne",
+    "=": "eq",
+}
+
+# Unary operators of the DataTable filter queries, with their test of a value
+filter_unary_operators = {
+    "blank": lambda value: value is None
+    or (isinstance(value, str) and not value.strip()),
+    "nil": lambda value: value is None,
+    "num": lambda value: isinstance(value, (int, float, np.number))
+    and not isinstance(value, (bool, np.bool_)),
+    "str": lambda value: isinstance(value, str),
+    "bool": lambda value: isinstance(value, (bool, np.bool_)),
+    "prime": lambda value: isinstance(value, (int, float, np.number))
+    and not isinstance(value, (bool, np.bool_))
+    and is_prime(value),
+}
+
+# Tokens of the DataTable filter queries, see parse_filter_term
+filter_column_pattern = re.compile(r"\s*\{(?P<column>[^}]+)\}")
+filter_unary_pattern = re.compile(r"\s+is\s+(?P<unary>blank|nil|num|str|bool|prime)\b")
+filter_operator_pattern = re.compile(
+    r"\s*(?:(?P<case>[is]?)(?P<operator>ge|le|lt|gt|ne|eq|contains|datestartswith)\s"
+    r"|(?P<symbol_case>[is]?)(?P<symbol>>=|<=|<|>|!=|=))\s*"
+)
+filter_quoted_pattern = re.compile(
+    r"(?P<value>\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'|`(?:[^`\\]|\\.)*`)"
+)
+
+# "and" and "or" only join conditions when another condition follows them
+filter_and_pattern = re.compile(r"\s*(?:&&|\b(?i:and)\b)(?=\s*[{(!])")
+filter_or_pattern = re.compile(r"\s*(?:\|\||\b(?i:or)\b)(?=\s*[{(!])")
+
+# Unquoted values, outside and inside parentheses
+filter_value_patterns = [
+    re.compile(r"(?P<value>.+?)(?=\s*(?:(?:&&|\|\||\b(?i:and|or)\b)\s*[{(!]|$))"),
+    re.compile(r"(?P<value>.+?)(?=\s*(?:(?:&&|\|\||\b(?i:and|or)\b)\s*[{(!]|\)|$))"),
+]
+
+# Filtered data of the most recent selections, used in the "server" store mode
+frame_cache = LRUCache(
+    int(os.environ.get("DASHBOARD_STORE_CACHE_SIZE", 64)),
+    maxbytes=int(float(os.environ.get("DASHBOARD_STORE_CACHE_MB", 256)) * 2**20),
+)
+
+# Figures of the most recent selections, bounded in number and in size (MB of JSON)
+figure_cache = LRUCache(
+    int(os.environ.get("DASHBOARD_FIGURE_CACHE_SIZE", 128)),
+    maxbytes=int(float(os.environ.get("DASHBOARD_FIGURE_CACHE_MB", 64)) * 2**20),
+)
+
+# Upper bounds in seconds of the latency histogram buckets of /metrics
+latency_buckets = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+# Callback requests and export images recorded for /metrics
+metrics_lock = threading.Lock()
+callback_metrics = defaultdict(
+    lambda: {
+        "count": 0,
+        "errors": 0,
+        "seconds": 0.0,
+        "buckets": [0] * (len(latency_buckets) + 1),
+        "request_bytes": 0,
+        "response_bytes": 0,
+    }
+)
+export_metrics = {
+    "count": 0,
+    "errors": 0,
+    "seconds": 0.0,
+    "buckets": [0] * (len(latency_buckets) + 1),
+}
+
+# Plot images are written by a pool of export workers, each export is a job whose
+# status is polled by the dashboard
+export_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("DASHBOARD_EXPORT_WORKERS", 1)),
+    thread_name_prefix="export",
+)
+export_jobs = LRUCache(100)
+
+# Columns of the filtered data used by plot4 and the table, the View Modules plots read
+# the course progress cube instead of the "course" store data
+store_columns = {
+    "student": ["module_name", "items_title", "items_type", "item_cp_req_completed"],
+    "module": ["items_id", "student_id", "item_cp_req_type", "item_cp_req_completed"],
+}
+
+# Filters that recreate the data of each store
+store_filters = {
+    "student": filter_student_data,
+    "course": filter_course_data,
+    "module": filter_module_data,
+}
+
+# Rows of the most recently selected courses of a data directory, within a memory budget
+course_frames = LRUCache(
+    int(os.environ.get("DASHBOARD_COURSE_CACHE_SIZE", 1000)),
+    maxbytes=int(float(os.environ.get("DASHBOARD_COURSE_MEMORY_MB", 1024)) * 2**20),
+    on_evict=evict_course,
+)
+
+# Make the mapping of the course ids to the course names
+global course_dict
+
+course_dict = defaultdict(str)
+update_names(data)
+
+# Lookup tables of every course, filled on first selection of the course
+course_catalogs = {}
+
+# Progress cubes of every course, filled on first selection of the course
+course_cubes = {}
+
+# Number of times the rows of each course changed since the data was loaded
+course_versions = {}
+
+
+####################
+#     Layout       #
+####################
+
+# Styling
+
+# Define the style for the tabs
+tab_style = {
+    "height": "50px",
+    "padding": "8px",
+    "textAlign": "center",
+    "display": "flex",
+    "alignItems": "center",
+    "justifyContent": "center",
+    "border-radius": "10px",
+    "margin-right": "10px",
+    "margin-left": "10px",
+}
+
+# Define the style for the selected tab
+selected_tab_style = {
+    "height": "50px",
+    "padding": "5px",
+    "borderTop": "2px solid #13233e",
+    "borderBottom": "2px solid #13233e",
+    "backgroundColor": "#13233e",
+    "color": "white",
+    "textAlign": "center",
+    "display": "flex",
+    "alignItems": "center",
+    "justifyContent": "center",
+    "border-radius": "10px",
+    "margin-right": "10px",
+    "margin-left": "10px",
+}
+
+# Define header style
+heading_style = {
+    "borderTop": "2px solid #aab4c2",
+    "borderBottom": "2px solid #aab4c2",
+    "backgroundColor": "#aab4c2",
+    "color": "white",
+    "padding": "5px",
+    "text-align": "center",
+}
+
+sub_heading_style = {
+    "font-size": "20px",
+    "font-weight": "bold",
+    "color": "#13233e",
+    "padding": "5px",
+    "text-align": "center",
+}
+
+# Define text style
+text_style = {
+    "font-size": "16px",
+    "font-weight": "bold",
+    "color": "#13233e",
+    "padding": "5px",
+}
+
+sidebar_text_style = {
+    "font-size": "10px",
+    "display": "inline-block",
+    "color": "#13233e",
+    "padding": "5px",
+}
+
+
+# Style Html Div
+div_style = {
+    "display": "flex",
+    "justify-content": "center",
+    "align-items": "center",
+}
+
+# Dropdpown options
+
+course_options = get_course_options()
+
+
+# Colorblind friendly colors
+# Ref: https://jacksonlab.agronomy.wisc.edu/2016/05/23/15-level-colorblind-friendly-palette/
+color_palette_1 = [
+    "#000000",
+    "#004949",
+    "#009292",
+    "#ff6db6",
+    "#ffb6db",
+    "#490092",
+    "#006ddb",
+    "#b66dff",
+    "#6db6ff",
+    "#b6dbff",
+    "#920000",
+    "#924900",
+    "#db6d00",
+    "#24ff24",
+    "#ffff6d",
+]
+
+# Ref: https://stackoverflow.com/questions/65013406/how-to-generate-30-distinct-colors-that-are-color-blind-friendly
+color_palette_2 = [
+    "#999999",
+    "#E69F00",
+    "#56B4E9",
+    "#009E73",
+    "#F0E442",
+    "#0072B2",
+    "#D55E00",
+    "#CC79A7",
+]
+
+# Ref: https://stackoverflow.com/questions/65013406/how-to-generate-30-distinct-colors-that-are-color-blind-friendly
+color_palette_3 = [
+    "#000000",
+    "#E69F00",
+    "#56B4E9",
+    "#009E73",
+    "#F0E442",
+    "#0072B2",
+    "#D55E00",
+    "#CC79A7",
+]
+
+# Plots font style, adjust as per your requirement
+axis_label_font_size = 14
+title_font_size = 16
+
+
+#############
+# Figures   #
+#############
+
+
+def build_module_completion_figure(
+    selection, value, student_selected, progress_df=None
+):
+    """
+    Returns a stacked horizontal barplot of percentage of student completion of selected modules
+
+    Parameters:
+        selection (list): selected course, students and modules
+        value (str): Selected module status
+        student_selected (str): student_id
+        progress_df (dataframe): progress of the selection, sliced from the cube if None
+
+    Returns:
+        fig_1 (figure): plotly figure
+    """
+    # Progress of the selected students in the selected modules
+    selected_course, selected_students, selected_modules = selection
+    if progress_df is None:
+        progress_df = get_cube_slice(
+            selected_course, "progress", selected_students, selected_modules
+        )
+
+    # Lookup tables of the selected course
+    catalog = get_course_catalog(selected_course)
+    module_num = catalog["module_num"]
+
+    if value not in module_status and value != "All":
+        print("Check radio button value for module status, it is invalid")
+
+    if value == "All":
+        radio_selection = module_status
+
+    if value in module_status:
+        radio_selection = value
+
+    # Percentage of students in every state of every module
+    df_mod = (get_state_percentages(progress_df) * 100).round(1)
+    df_mod.index = [module_num.get(module) for module in df_mod.index]
+    df_mod = df_mod.reset_index().rename(columns={"index": "Module"})
+
+    # Melt the DataFrame to convert columns to rows
+    melted_df = pd.melt(
+        df_mod,
+        id_vars="Module",
+        value_vars=radio_selection,
+        var_name="Status",
+        value_name="Percentage Completion",
+    )
+
+    # Define the color mapping
+    color_mapping = {
+        module_status[len(module_status) - (i + 1)]: color_palette_2[i]
+        for i in range(len(module_status))
+    }
+
+    # Create a horizontal bar chart using Plotly
+    fig_1 = px.bar(
+        melted_df,
+        y="Module",
+        x="Percentage Completion",
+        color="Status",
+        orientation="h",
+        labels={"Percentage Completion": "Percentage Completion"},
+        category_orders={"Module": sorted(melted_df["Module"].unique())},
+        color_discrete_map=color_mapping,  # Set the color mapping
+    )
+
+    fig_1.update_layout(
+        showlegend=True,  # Show the legend indicating the module status colors
+        legend_title="Status",  # Customize the legend title,
+        legend_traceorder="reversed",  # Reverse the order of the legend items
+    )
+
+    # Modify the plotly configuration to change the background color
+    fig_1.update_layout(
+        title={
+            "text": f"Percentage completion for {get_student_name(selected_course, student_selected)}",
+            "font": {"size": title_font_size},
+        },
+        xaxis=dict(title_font=dict(size=axis_label_font_size)),
+        yaxis=dict(title_font=dict(size=axis_label_font_size)),
+        xaxis_range=[0, 100],
+        plot_bgcolor="rgba(240, 240, 240, 0.8)",
+        xaxis_gridcolor="rgba(200, 200, 200, 0.2)",
+        yaxis_gridcolor="rgba(200, 200, 200, 0.2)",
+        margin=dict(l=50, r=50, t=50, b=50),
+        paper_bgcolor="white",
+    )
+
+    return fig_1
+
+
+def build_duration_figure(selection, student_selected):
+    """
+    Returns a barchart of the average days to completion of selected modules in the selected course
+
+    Parameters:
+        selection (list): selected course, students and modules
+        student_selected (str): student_id
+
+    Returns:
+        fig_2 (figure): plotly figure
+    """
+    # Completions of the selected students in the selected modules, one per student
+    selected_course, selected_students, selected_modules = selection
+    completions_df = get_cube_slice(
+        selected_course, "completions", selected_students, selected_modules
+    )
+
+    # Lookup tables of the selected course
+    module_num = get_course_catalog(selected_course)["module_num"]
+
+    # Calculate the mean, median and quartiles of the duration for each module
+    mean_duration_df = get_duration_statistics(completions_df)
+    mean_duration_df["module"] = [
+        module_num.get(str(module)) for module in mean_duration_df["module_id"]
+    ]
+    mean_duration_df = mean_duration_df.sort_values("module")
+
+    # Sort the modules by the label
+    sorted_modules = sorted(mean_duration_df["module"])
+
+    # Create the bar chart using Plotly Express
+    fig_2 = px.bar(
+        mean_duration_df,
+        x="duration",
+        y="module",
+        orientation="h",
+        labels={"duration": "Average Duration (Days)", "module": "Module"},
+        category_orders={"module": sorted_modules},
+        custom_data=["median", "p25", "p75"],
+    )
+
+    fig_2.update_layout(
+        title={
+            "text": f"Days to complete module by {get_student_name(selected_course, student_selected)}",
+            "font": {"size": title_font_size},
+        },
+        xaxis_title_font=dict(
+            size=axis_label_font_size
+        ),  # Adjust the x-axis title font size
+        yaxis_title_font=dict(
+            size=axis_label_font_size
+        ),  # Adjust the y-axis title font size
+        plot_bgcolor="rgba(240, 240, 240, 0.8)",  # Light gray background color
+        xaxis_gridcolor="rgba(200, 200, 200, 0.2)",  # Faint gridlines
+        yaxis_gridcolor="rgba(200, 200, 200, 0.2)",  # Faint gridlines
+        margin=dict(l=50, r=50, t=50, b=50),  # Add margin for a border line
+        paper_bgcolor="white",  # Set the background color of the entire plot
+    )
+
+    # Customize the hover template
+    hover_template = (
+        "<b>%{y}</b><br>"
+        + "Mean Duration: %{x:.2f} days<br>"
+        + "Median Duration: %{customdata[0]:.1f} days<br>"
+        + "Middle 50%: %{customdata[1]:.1f} - %{customdata[2]:.1f} days<br>"
+        + "<extra></extra>"
+    )  # The <extra></extra> tag removes the "trace 0" label
+
+    fig_2.update_traces(hovertemplate=hover_template)
+
+    return fig_2
+
+
+def build_timeline_figure(
+    selection, start_date, end_date, student_selected, progress_df=None
 ):
     """
     Returns a lineplot of module completion by percentage of students.
 
     Parameters:
-        filtered_data (json): filtered data
+        selection (list): selected course, students and modules
         start_date (str): Selected start date
         end_date (str): Selected end date
-        course_selected (str): course_id
         student_selected (str): student_id
-        n_clicks (int): button click none or 1
-        active_tab ('str'): tab_id
-
+        progress_df (dataframe): progress of the selection, sliced from the cube if None
 
     Returns:
-        fig_3_json (json): JSON serializable format of plot
+        fig_3 (figure): plotly figure
     """
-    if filtered_data is not None:
-        # Convert the filtered data back to DataFrame
-        filtered_df = pd.read_json(filtered_data, orient="split")
+    # Progress of the selected students in the selected modules
+    selected_course, selected_students, selected_modules = selection
+    if progress_df is None:
+        progress_df = get_cube_slice(
+            selected_course, "progress", selected_students, selected_modules
+        )
+
+    # Lookup tables of the selected course
+    catalog = get_course_catalog(selected_course)
+    module_num = catalog["module_num"]
 
     if isinstance(start_date, str):
         start_date = datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
@@ -755,40 +2973,12 @@ def update_timeline(
     assert isinstance(start_date, datetime.date)
     assert isinstance(end_date, datetime.date)
 
-    # Initialize dicts
-    module_dict = defaultdict(str)
-
-    for _, row in filtered_df.iterrows():
-        module_dict[str(row["module_id"])] = re.sub(
-            r"^Module\s+\d+:\s+", "", row["module_name"]
-        )
-
-    # For each module, create a lineplot with date on the x axis, percentage completion on y axis
-    result_time = pd.DataFrame(columns=["Date", "Module", "Percentage Completion"])
-
-    for module in module_dict.keys():
-        timestamps = filtered_df[filtered_df.module_id.astype(str) == module][
-            "completed_at"
-        ].dt.date.unique()
-        timestamps = [
-            x for x in timestamps if type(x) != pd._libs.tslibs.nattype.NaTType
-        ]
-
-        filtered_timestamps = [
-            timestamp for timestamp in timestamps if start_date <= timestamp <= end_date
-        ]
-
-        for date in filtered_timestamps:
-            value = round(
-                get_completed_percentage_date(filtered_df, module, date) * 100, 1
-            )
-
-            new_df = pd.DataFrame(
-                [[date, module_num.get(module), value]],
-                columns=["Date", "Module", "Percentage Completion"],
-            )
-
-            result_time = pd.concat([result_time, new_df], ignore_index=True)
+    # For each module, the percentage completion on every completion date in the date range
+    result_time = get_completion_timeline(progress_df, start_date, end_date)
+    result_time["Module"] = [
+        module_num.get(module) for module in result_time["module_id"]
+    ]
+    result_time["Percentage Completion"] = result_time["Percentage Completion"].round(1)
 
     # Plotting
     fig_3 = go.Figure()
@@ -802,7 +2992,7 @@ def update_timeline(
                     y=sorted_group["Percentage Completion"],
                     mode="markers",
                     name=module,
-                    marker=dict(color=module_colors[module]),
+                    marker=dict(color=catalog["module_colors"][module]),
                 )
             )
 
@@ -813,13 +3003,13 @@ def update_timeline(
                     y=sorted_group["Percentage Completion"],
                     mode="lines",
                     name=module,
-                    line=dict(color=module_colors[module]),
+                    line=dict(color=catalog["module_colors"][module]),
                 )
             )
 
     fig_3.update_layout(
         title={
-            "text": f"Module completion timeline by {student_dict.get(student_selected)}",
+            "text": f"Module completion timeline by {get_student_name(selected_course, student_selected)}",
             "font": {"size": title_font_size},
         },
         xaxis=dict(
@@ -840,396 +3030,565 @@ def update_timeline(
     tick_labels = [date.strftime("%Y-%m-%d") for date in tick_dates]
     fig_3.update_xaxes(tickvals=tick_dates, ticktext=tick_labels)
 
-    # Convert the figure to a JSON serializable format
-    fig_3_json = fig_3.to_dict()
+    return fig_3
 
-    # Create the folder to save the image if not exists
-    download_path = f"results/{course_dict.get(course_selected)}/"
-    if not os.path.exists(download_path):
-        os.makedirs(download_path)
 
-    if n_clicks and active_tab == "view-modules":
-        image_name = (
-            f"Module completion timeline by {student_dict.get(student_selected)}.png"
-        )
-        pio.write_image(fig_3, "".join([download_path, image_name]))
+def build_item_completion_figure(item_completion, course_selected, module_selected):
+    """
+    Returns a barplot of percentage of students who completed the items
+
+    Parameters:
+        item_completion (dataframe): completion of the selected items, see get_item_completion
+        course_selected (str): course_id
+        module_selected (str): module_id
+
+    Returns:
+        fig_4 (figure): plotly figure
+    """
+    # Item labels and module names of the selected course
+    catalog = get_course_catalog(course_selected)
+    items_pos = catalog["item_pos"]
+
+    # The items without a completion requirement are shown with no completion
+    percentage = (
+        item_completion["completed_students"] / item_completion["students"] * 100
+    ).where(item_completion["required"], 0)
+
+    df_mod = pd.DataFrame(
+        {
+            "Items": [items_pos.get(item) for item in item_completion.index],
+            "Percentage": percentage.round(2).to_numpy(),
+        }
+    )
+
+    # Create the bar plot using Plotly
+    fig_4 = go.Figure()
+
+    fig_4.add_trace(go.Bar(y=df_mod["Items"], x=df_mod["Percentage"], orientation="h"))
+
+    fig_4.update_layout(
+        title=f"Percentage of completion of items in {catalog['module_names'].get(module_selected)}",
+        xaxis_title="Percentage Completion",
+        yaxis_title="Items",
+        xaxis_range=[0, 100],
+        showlegend=False,
+        yaxis=dict(categoryorder="category descending"),
+    )
+
+    return fig_4
+
+
+##############
+# Callbacks  #
+##############
+
+
+@app.callback(
+    Output("module-checkboxes", "options"),
+    Output("module-checkboxes", "value"),
+    Input("course-dropdown", "value"),
+)
+def update_module_checklist(val):
+    """
+    Updates the module checklist in the 'View Modules'
+
+    Parameters:
+        val (str): Selected Course
+
+    Returns:
+        module_options (list): Module Checkboxes options
+        def_value (list): Module checkbox default selections
+    """
+
+    # Handling edge case
+    if val is None:
+        module_options = [
+            {"label": "No Course selected", "value": "No Course selected"}
+        ]
+        def_value = module_options
+        return module_options, def_value
+
+    # Lookup tables of the selected course
+    catalog = get_course_catalog(val)
+
+    module_num = catalog["module_num"]
+    module_dict = catalog["module_dict"]
+
+    if val != None:
+        module_options = [
+            {
+                "label": f"{module_num[module_id]}" + " " + f"{module_name}",
+                "value": module_id,
+            }
+            for module_id, module_name in module_dict.items()
+        ]
 
-    return fig_3_json, None
+    # default value, selects all the items in the checklist
+    def_value = [module_options[i]["value"] for i in range(len(module_options))]
+    return module_options, def_value
 
 
-# Plot 2, Duration Bar Chart
+# # Update items checklist
 @app.callback(
-    Output("plot2", "figure"),
-    Output("export-button", "n_clicks", allow_duplicate=True),
-    [
-        Input("course-specific-data", "data"),
-        Input("course-dropdown", "value"),
-        Input("student-dropdown-modules-tab", "value"),
-        Input("export-button", "n_clicks"),
-    ],
-    State("tabs", "value"),
-    prevent_initial_call=True,
+    Output("item-checkboxes", "options"),
+    Output("item-checkboxes", "value"),
+    [Input("course-dropdown", "value"), Input("module-dropdown", "value")],
 )
-def update_barchart_duration(
-    filtered_data, course_selected, student_selected, n_clicks, active_tab
-):
+def update_item_checklist(selected_course, selected_module):
     """
-    Returns a barchart of the aveerage days to completion of selected modules in the selected course
+    Updates the module checklist in the 'View Items' tab
 
     Parameters:
-        filtered_data (json): filtered data
-        course_selected (str): course_id
-        student_selected (str): student_id
-        n_clicks (int): button click none or 1
-        active_tab ('str'): tab_id
+        selected_course (str): Selected Course
+        selected_module (str): Selected Module
+
+    Returns:
+        item_options (list): Item Checkboxes options
+        def_value (list): Item checkbox default selections
+    """
+
+    # Handling edge case
+    if selected_course is None or selected_module is None:
+        item_options = [
+            {
+                "label": "Either Course or Module not selected",
+                "value": "No Course selected",
+            }
+        ]
+        def_value = item_options
+        return item_options, def_value
+
+    # Lookup tables of the selected course, items under the selected module
+    catalog = get_course_catalog(selected_course)
+    items_pos = catalog["item_pos"]
+    item_names = catalog["item_dict"]
+    module_items = catalog["module_items"].get(selected_module, [])
+
+    if selected_course != None and selected_module != None:
+        item_options = [
+            {
+                "label": f"{items_pos[item_id]}" + " " + f"{item_names[item_id]}",
+                "value": item_id,
+            }
+            for item_id in module_items
+        ]
+
+    # default selection
+    def_value = [item_options[i]["value"] for i in range(len(item_options))]
+    return item_options, def_value
+
+
+# Update module-dropdown options
+@app.callback(
+    Output("module-dropdown", "options"),
+    Output("module-dropdown", "value"),
+    Input("course-dropdown", "value"),
+)
+def update_module_dropdown(val):
+    """
+    Updates the module dropdown in the 'View Items' tab
 
+    Parameters:
+        val (str): Selected Course
 
     Returns:
-        fig_2_json (json): JSON serializable format of plot
+        module_options (list): Module selection options
+        def_value (str): Module default selection
     """
 
     # Handling edge case
-    if filtered_data is not None:
-        # Convert the filtered data back to DataFrame
-        filtered_df = pd.read_json(filtered_data, orient="split")
+    if val is None:
+        module_options = [{"label": "No Course selected", "value": 0}]
+        return module_options
 
-    # filter the data by state = "completed"
-    filtered_df = filtered_df[filtered_df.state == "completed"]
+    # Lookup tables of the selected course
+    module_dict = get_course_catalog(val)["module_dict"]
 
-    # Ensure that the course has a unique start date
-    assert (
-        filtered_df["course_start_date"].unique().size == 1
-    ), "More than one course start date found for this course"
+    if val != None:
+        module_options = [
+            {"label": module_name, "value": module_id}
+            for module_id, module_name in module_dict.items()
+        ]
 
-    course_start_date = filtered_df["course_start_date"].unique()[0]
+    def_value = module_options[0]["value"]
 
-    if isinstance(course_start_date, str):
-        course_start_date = datetime.datetime.strptime(
-            course_start_date, "%Y-%m-%dT%H:%M:%SZ"
-        )
+    return module_options, def_value
 
-    assert isinstance(course_start_date, datetime.datetime)
 
-    # Convert 'completed_at' column to datetime
-    filtered_df["completed_at"] = pd.to_datetime(
-        filtered_df["completed_at"], format="mixed"
-    )
+# Update student-dropdown options
+@app.callback(
+    Output("student-dropdown-students-tab", "options"),
+    Output("student-dropdown-modules-tab", "options"),
+    Input("course-dropdown", "value"),
+)
+def update_student_dropdown_modules(val):
+    """
+    Updates the student dropdown
 
-    filtered_df = filtered_df.assign(
-        duration=(filtered_df["completed_at"] - course_start_date).map(lambda x: x.days)
-    )
+    Parameters:
+        val (str): Selected Course
 
-    # We want to keep only one unique row per student, thereby there are no repetition for the same student
-    filtered_df = filtered_df[
-        ["module_id", "module_name", "state", "duration", "student_id"]
-    ].drop_duplicates()
-    filtered_df["module"] = filtered_df["module_id"].apply(
-        lambda x: module_num.get(str(x))
-    )
+    Returns:
+        student_options (list): Student selection options
+    """
 
-    # Calculate the mean duration for each module
-    mean_duration_df = filtered_df.groupby("module")["duration"].mean().reset_index()
+    # Handling edge case
+    if val is None:
+        student_options = [{"label": "No Course selected", "value": 0}]
+        return student_options, student_options
 
-    # Sort the modules by the label
-    sorted_modules = sorted(mean_duration_df["module"])
+    # Lookup tables of the selected course
+    student_dict = get_course_catalog(val)["student_dict"]
 
-    # Create the bar chart using Plotly Express
-    fig_2 = px.bar(
-        mean_duration_df,
-        x="duration",
-        y="module",
-        orientation="h",
-        labels={"duration": "Average Duration (Days)", "module": "Module"},
-        category_orders={"module": sorted_modules},
-    )
+    if val != None:
+        student_options = [
+            {"label": student_name, "value": student_id}
+            for student_id, student_name in student_dict.items()
+        ]
 
-    fig_2.update_layout(
-        title={
-            "text": f"Days to complete module by {student_dict.get(student_selected)}",
-            "font": {"size": title_font_size},
-        },
-        xaxis_title_font=dict(
-            size=axis_label_font_size
-        ),  # Adjust the x-axis title font size
-        yaxis_title_font=dict(
-            size=axis_label_font_size
-        ),  # Adjust the y-axis title font size
-        plot_bgcolor="rgba(240, 240, 240, 0.8)",  # Light gray background color
-        xaxis_gridcolor="rgba(200, 200, 200, 0.2)",  # Faint gridlines
-        yaxis_gridcolor="rgba(200, 200, 200, 0.2)",  # Faint gridlines
-        margin=dict(l=50, r=50, t=50, b=50),  # Add margin for a border line
-        paper_bgcolor="white",  # Set the background color of the entire plot
-    )
+    # Add the 'All' option at beginning of the list
+    student_options.insert(0, {"label": "All", "value": "All"})
 
-    # Customize the hover template
-    hover_template = (
-        "<b>%{y}</b><br>" + "Mean Duration: %{x:.2f} days<br>" + "<extra></extra>"
-    )  # The <extra></extra> tag removes the "trace 0" label
+    return student_options, student_options
 
-    fig_2.update_traces(hovertemplate=hover_template)
 
-    fig_2_json = fig_2.to_dict()
+# Filter the data based on user selections
+@app.callback(
+    Output("student-specific-data", "data"),
+    [
+        Input("course-dropdown", "value"),
+        Input("student-dropdown-students-tab", "value"),
+        Input("tabs", "value"),
+    ],
+    State("student-specific-data", "data"),
+)
+def update_student_filtered_data(
+    selected_course, selected_students, active_tab, stored_data
+):
+    """
+    Returns a filtered dataset by selected course and selected students
+
+    The data is only filtered while the View Students tab is shown, a selection made
+    while it is hidden is filtered when the tab is shown.
+
+    Parameters:
+        selected_course (str): Selected Course
+        selected_students (str): Selected Students
+        active_tab (str): tab_id of the shown tab
+        stored_data (dict): current filtered data
+
+    Returns:
+        filtered_data (dict): filtered data for storage
+    """
+    selection = [selected_course, selected_students]
 
-    # Create the folder to save the image if not exists
-    download_path = f"results/{course_dict.get(course_selected)}/"
-    if not os.path.exists(download_path):
-        os.makedirs(download_path)
+    # Defer hidden tabs, and keep the data when the tab is shown again unchanged
+    if active_tab != "view-students":
+        raise PreventUpdate
+    if is_stored(stored_data, "student", selection):
+        return no_update
 
-    if n_clicks and active_tab == "view-modules":
-        image_name = (
-            f"Days to complete module by {student_dict.get(student_selected)}.png"
-        )
-        pio.write_image(fig_2, "".join([download_path, image_name]))
+    # Keep the selection, and the filtered data if the store mode carries it, for the plots
+    filtered_data = to_store("student", selection)
 
-    return fig_2_json, None
+    return filtered_data
 
 
-# Plot 1, Modules Barplot
+# filter the data based on user selections
 @app.callback(
-    Output("plot1", "figure"),
-    Output("export-button", "n_clicks", allow_duplicate=True),
+    Output("course-specific-data", "data"),
     [
-        Input("course-specific-data", "data"),
-        Input("status-radio", "value"),
         Input("course-dropdown", "value"),
         Input("student-dropdown-modules-tab", "value"),
-        Input("export-button", "n_clicks"),
+        Input("module-checkboxes", "value"),
     ],
-    State("tabs", "value"),
-    prevent_initial_call=True,
 )
-def update_module_completion_barplot(
-    filtered_data, value, course_selected, student_selected, n_clicks, active_tab
-):
+def update_course_filtered_data(selected_course, selected_students, selected_modules):
     """
-    Returns a stacked horizontal barplot of percentage of student completion of selected modules
+    Returns a filtered dataset by selected course, selected students and selected modules
 
     Parameters:
-        filtered_data (json): filtered data
-        value (str): Selected module status
-        course_selected (str): course_id
-        student_selected (str): student_id
-        n_clicks (int): button click none or 1
-        active_tab ('str'): tab_id
-
+        selected_course (str): Selected Course
+        selected_students (str): Selected Students
+        selected_students (list): Selected Modules
 
     Returns:
-        fig_1_json (json): JSON serializable format of plot
+        filtered_data (dict): filtered data for storage
     """
-    if filtered_data is not None:
-        # Convert the filtered data back to DataFrame
-        filtered_df = pd.read_json(filtered_data, orient="split")
 
-    if value not in module_status and value != "All":
-        print("Check radio button value for module status, it is invalid")
+    # Keep the selection, and the filtered data if the store mode carries it, for the plots
+    filtered_data = to_store(
+        "course", [selected_course, selected_students, selected_modules]
+    )
 
-    if value == "All":
-        radio_selection = module_status
+    return filtered_data
 
-    if value in module_status:
-        radio_selection = value
 
-    result = {}
-    modules = list(filtered_df.module_id.unique().astype(str))
+# Filter the data based on user selections
+@app.callback(
+    Output("module-specific-data", "data"),
+    [
+        Input("course-dropdown", "value"),
+        Input("module-dropdown", "value"),
+        Input("item-checkboxes", "value"),
+        Input("tabs", "value"),
+    ],
+    State("module-specific-data", "data"),
+)
+def update_module_filtered_data(
+    selected_course, selected_module, selected_items, active_tab, stored_data
+):
+    """
+    Returns a filtered dataset by selected course, selected students, selected modules and selected items
 
-    for module in modules:
-        result[module_num.get(module)] = [
-            round(
-                get_completed_percentage(filtered_df, module, module_status[i]) * 100, 1
-            )
-            for i in range(len(module_status))
-        ]
+    The data is only filtered while the View Items tab is shown, a selection made while
+    it is hidden is filtered when the tab is shown.
 
-    df_mod = (
-        pd.DataFrame(result, index=module_status)
-        .T.reset_index()
-        .rename(columns={"index": "Module"})
-    )
+    Parameters:
+        selected_course (str): Selected Course
+        selected_module (str): Selected Modules
+        selected_items (list): Selected Items
+        active_tab (str): tab_id of the shown tab
+        stored_data (dict): current filtered data
 
-    # Melt the DataFrame to convert columns to rows
-    melted_df = pd.melt(
-        df_mod,
-        id_vars="Module",
-        value_vars=radio_selection,
-        var_name="Status",
-        value_name="Percentage Completion",
-    )
+    Returns:
+        filtered_data (dict): filtered data for storage
+    """
+    selection = [selected_course, selected_module, selected_items]
 
-    # Define the color mapping
-    color_mapping = {
-        module_status[len(module_status) - (i + 1)]: color_palette_2[i]
-        for i in range(len(module_status))
-    }
+    # Defer hidden tabs, and keep the data when the tab is shown again unchanged
+    if active_tab != "view-items":
+        raise PreventUpdate
+    if is_stored(stored_data, "module", selection):
+        return no_update
 
-    # Create a horizontal bar chart using Plotly
-    fig_1 = px.bar(
-        melted_df,
-        y="Module",
-        x="Percentage Completion",
-        color="Status",
-        orientation="h",
-        labels={"Percentage Completion": "Percentage Completion"},
-        category_orders={"Module": sorted(melted_df["Module"].unique())},
-        color_discrete_map=color_mapping,  # Set the color mapping
-    )
+    # Keep the selection, and the filtered data if the store mode carries it, for the plots
+    filtered_data = to_store("module", selection)
 
-    fig_1.update_layout(
-        showlegend=True,  # Show the legend indicating the module status colors
-        legend_title="Status",  # Customize the legend title,
-        legend_traceorder="reversed",  # Reverse the order of the legend items
-    )
+    return filtered_data
 
-    # Modify the plotly configuration to change the background color
-    fig_1.update_layout(
-        title={
-            "text": f"Percentage completion for {student_dict.get(student_selected)}",
-            "font": {"size": title_font_size},
-        },
-        xaxis=dict(title_font=dict(size=axis_label_font_size)),
-        yaxis=dict(title_font=dict(size=axis_label_font_size)),
-        xaxis_range=[0, 100],
-        plot_bgcolor="rgba(240, 240, 240, 0.8)",
-        xaxis_gridcolor="rgba(200, 200, 200, 0.2)",
-        yaxis_gridcolor="rgba(200, 200, 200, 0.2)",
-        margin=dict(l=50, r=50, t=50, b=50),
-        paper_bgcolor="white",
-    )
 
-    # Convert the figure to a JSON serializable format
-    fig_1_json = fig_1.to_dict()
+# Plots 1, 2 and 3, View Modules plots
+@app.callback(
+    Output("plot1", "figure"),
+    Output("plot2", "figure"),
+    Output("plot3", "figure"),
+    [
+        Input("course-specific-data", "data"),
+        Input("status-radio", "value"),
+        Input("date-slider", "start_date"),
+        Input("date-slider", "end_date"),
+    ],
+    prevent_initial_call=True,
+)
+def update_module_plots(filtered_data, value, start_date, end_date):
+    """
+    Returns the plots of the View Modules tab: the stacked barplot of module completion,
+    the barchart of days to completion and the lineplot of completion over time
+
+    The three plots are built in one request from one slice of the course progress.
+    When only the module status or the date range changed, only the plot using it is
+    built again and the others are left unchanged.
+
+    Parameters:
+        filtered_data (dict): filtered data
+        value (str): Selected module status
+        start_date (str): Selected start date
+        end_date (str): Selected end date
+
+    Returns:
+        fig_1_json, fig_2_json, fig_3_json (json): JSON serializable format of plots
+    """
+    # Handling edge case
+    if filtered_data is None:
+        raise PreventUpdate
+
+    selection = filtered_data["selection"]
+    selected_course, student_selected, selected_modules = selection
+
+    # Only the plot of the changed option is built again, unless the selection changed
+    triggered = set(ctx.triggered_prop_ids.values())
+    plots = ["plot1", "plot2", "plot3"]
+    if "course-specific-data" not in triggered:
+        plots = [
+            plot
+            for plot, option in [("plot1", "status-radio"), ("plot3", "date-slider")]
+            if option in triggered
+        ]
 
-    # Create the folder to save the image if not exists
-    download_path = f"results/{course_dict.get(course_selected)}/"
-    if not os.path.exists(download_path):
-        os.makedirs(download_path)
+    # Reuse the figures of a selection viewed before
+    figure_keys = {
+        "plot1": get_figure_key("plot1", selection, value, student_selected),
+        "plot2": get_figure_key("plot2", selection, student_selected),
+        "plot3": get_figure_key(
+            "plot3", selection, start_date, end_date, student_selected
+        ),
+    }
+    figures = {plot: figure_cache.get(figure_keys[plot]) for plot in plots}
 
-    if n_clicks and active_tab == "view-modules":
-        image_name = (
-            f"Percentage completion for {student_dict.get(student_selected)}.png"
+    # Progress of the selected students in the selected modules, shared by plots 1 and 3
+    progress_df = None
+    if figures.get("plot1") is None or figures.get("plot3") is None:
+        progress_df = get_cube_slice(
+            selected_course, "progress", student_selected, selected_modules
         )
-        pio.write_image(fig_1, "".join([download_path, image_name]))
 
-    return fig_1_json, None
+    builders = {
+        "plot1": lambda: build_module_completion_figure(
+            selection, value, student_selected, progress_df
+        ),
+        "plot2": lambda: build_duration_figure(selection, student_selected),
+        "plot3": lambda: build_timeline_figure(
+            selection, start_date, end_date, student_selected, progress_df
+        ),
+    }
+
+    for plot in plots:
+        if figures[plot] is None:
+            figure = builders[plot]()
+
+            # Convert the figure to a JSON serializable format
+            figures[plot] = figure.to_dict()
+            figure_cache.put(figure_keys[plot], figures[plot], len(figure.to_json()))
+
+    return tuple(figures.get(plot, no_update) for plot in ["plot1", "plot2", "plot3"])
 
 
 # Plot 4, Item Bar Chart
 @app.callback(
     Output("plot4", "figure"),
-    Output("export-button", "n_clicks", allow_duplicate=True),
     [
         Input("module-specific-data", "data"),
-        Input("course-dropdown", "value"),
-        Input("module-dropdown", "value"),
-        Input("export-button", "n_clicks"),
     ],
-    State("tabs", "value"),
     prevent_initial_call=True,
-    allow_duplicate=True,
 )
-def update_item_completion_barplot(
-    filtered_data, course_selected, module_selected, n_clicks, active_tab
-):
+def update_item_completion_barplot(filtered_data):
     """
     Returns a barplot of percentage of students who completed the items
 
+    The course and module are read from the selection of the store, the store is only
+    updated while the View Items tab is shown.
+
     Parameters:
-        filtered_data (json): filtered data
-        course_selected (str): course_id
-        module_selected (str): module_id
-        n_clicks (int): button click none or 1
-        active_tab ('str'): tab_id
+        filtered_data (dict): filtered data
 
 
     Returns:
         fig_4_json (json): JSON serializable format of plot
     """
     # Handling edge case
-    if filtered_data is not None:
-        # Convert the filtered data back to DataFrame
-        filtered_df = pd.read_json(filtered_data, orient="split")
+    if filtered_data is None:
+        raise PreventUpdate
 
-    result = {}
-    items = list(filtered_df.items_id.unique().astype(str))
+    course_selected, module_selected, _ = filtered_data["selection"]
 
-    # Initialize dicts
-    items_pos = defaultdict(str)
+    # Reuse the figure of a selection viewed before
+    figure_key = get_figure_key("plot4", filtered_data["selection"])
+    fig_4_json = figure_cache.get(figure_key)
 
-    for _, row in filtered_df.iterrows():
-        items_pos[str(row["items_id"])] = f"Item {row['items_position']}:"
-
-    # Drop the items where there is no item completion requirement
-    items_todrop = []
-    for item in items:
-        temp_df = filtered_df[filtered_df.items_id.astype(str) == item]
-        if all(temp_df.item_cp_req_type.isna()):
-            items_todrop.append(item)
+    if fig_4_json is None:
+        # Completion of all the selected items, aggregated by the database when it is used
+        if backend == "sqlite":
+            item_completion = query_item_completion(*filtered_data["selection"])
         else:
-            continue
-
-    filtered_df = filtered_df[~filtered_df.items_id.astype(str).isin(items_todrop)]
-
-    for item in items:
-        result[items_pos.get(item)] = round(
-            get_item_completion_percentage(filtered_df, item) * 100, 2
+            item_completion = get_item_completion(from_store(filtered_data))
+        fig_4 = build_item_completion_figure(
+            item_completion, course_selected, module_selected
         )
 
-    df_mod = pd.DataFrame(list(result.items()), columns=["Items", "Percentage"])
-
-    # Create the bar plot using Plotly
-    fig_4 = go.Figure()
-
-    fig_4.add_trace(go.Bar(y=df_mod["Items"], x=df_mod["Percentage"], orientation="h"))
-
-    fig_4.update_layout(
-        title=f"Percentage of completion of items in {module_dict.get(module_selected)}",
-        xaxis_title="Percentage Completion",
-        yaxis_title="Items",
-        xaxis_range=[0, 100],
-        showlegend=False,
-        yaxis=dict(categoryorder="category descending"),
-    )
-
-    # Convert the figure to a JSON serializable format
-    fig_4_json = fig_4.to_dict()
-
-    # Create the folder to save the image if not exists
-    download_path = f"results/{course_dict.get(course_selected)}/"
-    if not os.path.exists(download_path):
-        os.makedirs(download_path)
-
-    if n_clicks and active_tab == "view-items":
-        image_name = f"Percentage of completion of items in {module_dict.get(module_selected)}.png"
-        pio.write_image(fig_4, "".join([download_path, image_name]))
+        # Convert the figure to a JSON serializable format
+        fig_4_json = fig_4.to_dict()
+        figure_cache.put(figure_key, fig_4_json, len(fig_4.to_json()))
 
-    return fig_4_json, None
+    return fig_4_json
 
 
 # Table Callback
 @app.callback(
     Output("table-1", "data"),
     Output("table-1", "columns"),
+    Output("table-1", "page_count"),
+    Output("table-1", "page_current"),
+    Output("table-count", "children"),
     [
         Input("student-specific-data", "data"),
+        Input("table-1", "page_current"),
+        Input("table-1", "page_size"),
+        Input("table-1", "sort_by"),
+        Input("table-1", "filter_query"),
     ],
 )
-def update_student_table(filtered_data):
+def update_student_table(filtered_data, page_current, page_size, sort_by, filter_query):
     """
-    Returns a datatable with details of module, items, item types and item status
+    Returns a page of the datatable with details of module, items, item types and item status
+
+    The rows are filtered and sorted in the server and only the rows of the shown page
+    are sent to the browser.
 
     Parameters:
-        filtered_data (json): filtered data
+        filtered_data (dict): filtered data
+        page_current (int): index of the shown page
+        page_size (int): number of rows of a page
+        sort_by (list): columns and directions to sort the rows by
+        filter_query (str): filter of the rows, see parse_filter_query
+
+    Returns:
+        data (list): rows of the shown page
+        columns (list): columns of the table
+        page_count (int): number of pages
+        page_current (int): index of the shown page
+        row_count (str): number of rows that satisfy the filter, or why it is invalid
     """
+    # Handling edge case
+    if filtered_data is None:
+        raise PreventUpdate
 
-    if filtered_data is not None:
-        # Convert the filtered data back to DataFrame
-        filtered_df = pd.read_json(filtered_data, orient="split")
+    # Convert the filtered data back to DataFrame
+    filtered_df = from_store(filtered_data)
 
     filtered_df = filtered_df[
         ["module_name", "items_title", "items_type", "item_cp_req_completed"]
     ]
-    filtered_df["item_cp_req_completed"] = filtered_df["item_cp_req_completed"].map(
-        {1: "✅", 0: "❌", np.nan: "🔘"}
+
+    def format_status(df):
+        # A missing status, NaN or None depending on the store mode, is not started
+        return df.assign(
+            item_cp_req_completed=df["item_cp_req_completed"]
+            .astype(object)
+            .map({1: "✅", 0: "❌"})
+            .fillna("🔘")
+        )
+
+    # The status is only formatted for all the rows when it is filtered or sorted on
+    status_used = "{item_cp_req_completed}" in (filter_query or "") or any(
+        column["column_id"] == "item_cp_req_completed" for column in sort_by or []
     )
+    if status_used:
+        filtered_df = format_status(filtered_df)
+
+    # An invalid filter shows no rows rather than wrong ones
+    try:
+        filtered_df = filter_table(filtered_df, filter_query)
+        row_count = f"{len(filtered_df):,} rows"
+    except ValueError as error:
+        filtered_df = filtered_df.iloc[0:0]
+        row_count = str(error)
+
+    filtered_df = sort_table(filtered_df, sort_by)
+
+    # Show the first page of a new selection, filter or sort
+    if "table-1.page_current" not in ctx.triggered_prop_ids:
+        page_current = 0
+
+    page_size = page_size or table_page_size
+    page_count = max(1, -(-len(filtered_df) // page_size))
+    page_current = min(page_current or 0, page_count - 1)
+
+    page_df = filtered_df.iloc[
+        page_current * page_size : (page_current + 1) * page_size
+    ]
+    if not status_used:
+        page_df = format_status(page_df)
 
     # Define custom column headings
     custom_column_names = {
@@ -1246,10 +3605,136 @@ def update_student_table(filtered_data):
             "selectable": True,
             "deletable": False,
         }
-        for col in filtered_df.columns
+        for col in page_df.columns
+    ]
+
+    return (
+        page_df.to_dict("records"),
+        column_name,
+        page_count,
+        page_current,
+        row_count,
+    )
+
+
+# Export the plots of the active tab
+@app.callback(
+    Output("export-job", "data"),
+    Output("export-status", "children"),
+    Output("export-interval", "disabled"),
+    Input("export-button", "n_clicks"),
+    [
+        State("tabs", "value"),
+        State("course-dropdown", "value"),
+        State("student-dropdown-modules-tab", "value"),
+        State("module-dropdown", "value"),
+        State("plot1", "figure"),
+        State("plot2", "figure"),
+        State("plot3", "figure"),
+        State("plot4", "figure"),
+    ],
+    prevent_initial_call=True,
+)
+def export_plots(
+    n_clicks,
+    active_tab,
+    course_selected,
+    student_selected,
+    module_selected,
+    fig_1,
+    fig_2,
+    fig_3,
+    fig_4,
+):
+    """
+    Queues the export of the displayed plots of the active tab to the results folder
+
+    Parameters:
+        n_clicks (int): button clicks
+        active_tab ('str'): tab_id
+        course_selected (str): course_id
+        student_selected (str): student_id
+        module_selected (str): module_id
+        fig_1, fig_2, fig_3, fig_4 (dict): displayed plots
+
+    Returns:
+        export_job (dict): id of the export job
+        export_status (str): status message
+        disabled (bool): whether the status polling is disabled
+    """
+    # Handling edge case
+    if not n_clicks:
+        raise PreventUpdate
+
+    catalog = get_course_catalog(course_selected)
+    student_name = get_student_name(course_selected, student_selected)
+    if active_tab == "view-modules":
+        names = [
+            (fig_1, f"Percentage completion for {student_name}.png"),
+            (fig_3, f"Module completion timeline by {student_name}.png"),
+            (fig_2, f"Days to complete module by {student_name}.png"),
+        ]
+    elif active_tab == "view-items":
+        names = [
+            (
+                fig_4,
+                f"Percentage of completion of items in {catalog['module_names'].get(module_selected)}.png",
+            )
+        ]
+    else:
+        names = []
+
+    download_path = f"results/{catalog['course_name']}/"
+    images = [
+        (figure, "".join([download_path, name]))
+        for figure, name in names
+        if figure is not None
     ]
 
-    return filtered_df.to_dict("records"), column_name
+    # Handling edge case
+    if not images:
+        return None, "No plots to export on this tab", True
+
+    job_id = submit_export(images)
+
+    return {"job": job_id}, f"Exporting {len(images)} plot(s)...", False
+
+
+# Poll the status of the export job
+@app.callback(
+    Output("export-status", "children", allow_duplicate=True),
+    Output("export-interval", "disabled", allow_duplicate=True),
+    Input("export-interval", "n_intervals"),
+    State("export-job", "data"),
+    prevent_initial_call=True,
+)
+def update_export_status(n_intervals, export_job):
+    """
+    Returns the status message of the export job, the polling stops once the job is over
+
+    Parameters:
+        n_intervals (int): number of polls
+        export_job (dict): id of the export job
+
+    Returns:
+        export_status (str): status message
+        disabled (bool): whether the status polling is disabled
+    """
+    # Handling edge case
+    if export_job is None:
+        return None, True
+
+    job = get_export_status(export_job["job"])
+
+    if job["status"] == "done":
+        folder = os.path.dirname(job["files"][0])
+        return f"Saved {len(job['files'])} plot(s) to {folder}/", True
+    if job["status"] == "failed":
+        return f"Export failed: {job['error']}", True
+    if job["status"] == "unknown":
+        return None, True
+
+    return f"Exporting {len(job['files'])} plot(s)...", False
 
 
 # -----------------------------------------------------------------
@@ -1285,6 +3770,11 @@ tools = dbc.Container(
                             color="primary",
                             className="mr-2",
                         ),
+                        html.Div(id="export-status", style={"fontSize": "12px"}),
+                        dcc.Store(id="export-job"),
+                        dcc.Interval(
+                            id="export-interval", interval=1000, disabled=True
+                        ),
                     ],
                     width=1,
                 ),
@@ -1355,10 +3845,10 @@ module_sidebar = dbc.Container(
         ),
         dcc.DatePickerRange(
             id="date-slider",
-            min_date_allowed=min(pd.to_datetime(data["completed_at"])).date(),
-            max_date_allowed=max(pd.to_datetime(data["completed_at"])).date(),
-            start_date=min(pd.to_datetime(data["completed_at"])).date(),
-            end_date=max(pd.to_datetime(data["completed_at"])).date(),
+            min_date_allowed=get_date_range()[0],
+            max_date_allowed=get_date_range()[1],
+            start_date=get_date_range()[0],
+            end_date=get_date_range()[1],
             clearable=True,
         ),
     ],
@@ -1470,7 +3960,7 @@ pop = dbc.Popover(
     },
 )
 
-app.layout = dbc.Container(
+layout = dbc.Container(
     fluid=True,
     children=[
         html.Div(
@@ -1614,15 +4104,18 @@ app.layout = dbc.Container(
                                                 dash_table.DataTable(
                                                     id="table-1",
                                                     editable=False,
-                                                    filter_action="native",
-                                                    sort_action="native",
+                                                    # The rows are filtered, sorted and paged in the server
+                                                    filter_action="custom",
+                                                    filter_query="",
+                                                    sort_action="custom",
                                                     sort_mode="multi",
+                                                    sort_by=[],
                                                     row_deletable=False,
                                                     selected_columns=[],
                                                     selected_rows=[],
-                                                    # page_action="native",
-                                                    # page_current=0,
-                                                    # page_size=15, Optional to paginate the table
+                                                    page_action="custom",
+                                                    page_current=0,
+                                                    page_size=table_page_size,
                                                     style_table={
                                                         "height": "600px",
                                                         "overflowY": "auto",
@@ -1644,6 +4137,10 @@ app.layout = dbc.Container(
                                                         }
                                                     ],
                                                 ),
+                                                html.Div(
+                                                    id="table-count",
+                                                    style={"margin-top": "5px"},
+                                                ),
                                                 pop,
                                             ],
                                         ),
@@ -1692,5 +4189,105 @@ app.layout = dbc.Container(
     ],
 )
 
+
+def serve_layout():
+    """
+    Returns a copy of the layout with the courses and the timeline of the current data
+
+    Every page load gets its own copy, the layout is never changed by concurrent requests.
+    """
+    page_layout = copy.deepcopy(layout)
+
+    # The courses and dates are read together, not in the middle of a refresh
+    with data_lock:
+        options = get_course_options()
+        first_date, last_date = get_date_range()
+
+    page_layout["course-dropdown"].options = options
+    page_layout["course-dropdown"].value = options[0]["value"] if options else None
+
+    page_layout["date-slider"].min_date_allowed = first_date
+    page_layout["date-slider"].max_date_allowed = last_date
+    page_layout["date-slider"].start_date = first_date
+    page_layout["date-slider"].end_date = last_date
+
+    return page_layout
+
+
+app.layout = serve_layout
+
+
+# Reload endpoint, merges the new rows of the data file
+@app.server.route("/reload", methods=["POST"])
+def reload_data():
+    """
+    Refreshes the data and returns a summary of the refresh, see refresh_data
+
+    With DASHBOARD_RELOAD_TOKEN set, the request must send the token in the
+    X-Reload-Token header, otherwise only requests from the local machine are accepted.
+    """
+    if reload_token:
+        token = flask.request.headers.get("X-Reload-Token", "")
+        if not hmac.compare_digest(token.encode(), reload_token.encode()):
+            flask.abort(403)
+    elif flask.request.remote_addr not in ["127.0.0.1", "::1"]:
+        flask.abort(403)
+
+    return flask.jsonify(refresh_data())
+
+
+# Callback metrics, timed from the request to the response of every callback
+@app.server.before_request
+def start_callback_timer():
+    """
+    Starts the timer of a callback request
+    """
+    flask.g.callback_start = time.perf_counter()
+
+
+@app.server.after_request
+def time_callback(response):
+    """
+    Records the latency and payload sizes of a callback request, see record_callback
+    """
+    start = flask.g.pop("callback_start", None)
+
+    if start is not None and flask.request.path == "/_dash-update-component":
+        # Only the callbacks of the app are named, any other output sent by a client is
+        # recorded as one "unknown" series
+        payload = flask.request.get_json(silent=True)
+        output = payload.get("output") if isinstance(payload, dict) else None
+        callback = None
+        if isinstance(output, str):
+            callback = app.callback_map.get(output, {}).get("callback")
+        record_callback(
+            callback.__name__ if callback is not None else "unknown",
+            time.perf_counter() - start,
+            flask.request.content_length or 0,
+            response.calculate_content_length() or 0,
+            response.status_code,
+        )
+
+    return response
+
+
+# Metrics endpoint, in the Prometheus text format
+@app.server.route("/metrics")
+def metrics():
+    """
+    Returns the callback, export and cache metrics, see get_metrics_text
+    """
+    return flask.Response(
+        get_metrics_text(), mimetype="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+# Build the lookup tables and progress cubes of every course at start up
+if os.environ.get("DASHBOARD_PRELOAD", "0") == "1":
+    preload_data()
+
+if watch_interval > 0:
+    start_watcher()
+
 if __name__ == "__main__":
     app.run_server(debug=True)
@@ -0,0 +1,189 @@
+# imports
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import plotly.io as pio
+
+# Loads the data, the dashboard server is not started
+import app
+
+# -----------------------------------------------------------
+# Batch export of the plots of every course, without the dashboard
+#
+# Usage, from the root of the repository:
+#   python src/batch_export.py [--courses ID ...] [--per-student] [--per-module]
+#                              [--formats png pdf] [--workers N]
+# -----------------------------------------------------------
+
+
+def get_views(course_id, per_student=False, per_module=False):
+    """
+    Returns the views of a course to export, the default views of the dashboard and
+    optionally one view per student and per module
+
+    Parameters:
+        course_id (str): course_id
+        per_student (bool): add the View Modules plots of every student
+        per_module (bool): add the View Items plot of every module
+
+    Returns:
+        views (list): (course_id, tab, student_id or module_id) tuples
+    """
+    catalog = app.get_course_catalog(course_id)
+    module_ids = list(catalog["module_dict"])
+
+    students = ["All"]
+    if per_student:
+        students += list(catalog["student_dict"])
+
+    # The View Items tab shows the first module by default
+    modules = module_ids if per_module else module_ids[:1]
+
+    views = [(course_id, "view-modules", student_id) for student_id in students]
+    views += [(course_id, "view-items", module_id) for module_id in modules]
+
+    return views
+
+
+def export_view(view, formats, start_date, end_date, results_path):
+    """
+    Builds the plots of a view and writes them as images, run by the worker processes
+
+    Parameters:
+        view (tuple): course_id, tab and student_id or module_id, see get_views
+        formats (list): image formats, e.g. png and pdf
+        start_date (datetime.date): first date of the timeline
+        end_date (datetime.date): last date of the timeline
+        results_path (str): folder of the course folders
+
+    Returns:
+        course_id (str): course_id
+        images (int): number of images written
+    """
+    course_id, tab, selected = view
+    catalog = app.get_course_catalog(course_id)
+
+    if tab == "view-modules":
+        selection = [course_id, selected, list(catalog["module_dict"])]
+        student_name = app.get_student_name(course_id, selected)
+        figures = [
+            (
+                app.build_module_completion_figure(selection, "All", selected),
+                f"Percentage completion for {student_name}",
+            ),
+            (
+                app.build_timeline_figure(selection, start_date, end_date, selected),
+                f"Module completion timeline by {student_name}",
+            ),
+            (
+                app.build_duration_figure(selection, selected),
+                f"Days to complete module by {student_name}",
+            ),
+        ]
+    else:
+        items = catalog["module_items"].get(selected, [])
+        item_completion = app.get_item_completion(
+            app.filter_module_data(course_id, selected, items)
+        )
+        figures = [
+            (
+                app.build_item_completion_figure(item_completion, course_id, selected),
+                f"Percentage of completion of items in {catalog['module_names'].get(selected)}",
+            )
+        ]
+
+    download_path = os.path.join(results_path, catalog["course_name"])
+    os.makedirs(download_path, exist_ok=True)
+
+    for figure, name in figures:
+        for image_format in formats:
+            pio.write_image(
+                figure, os.path.join(download_path, f"{name}.{image_format}")
+            )
+
+    return course_id, len(figures) * len(formats)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Exports the plots of every course to the results folder"
+    )
+    parser.add_argument(
+        "--courses", nargs="+", help="course_ids to export, all courses by default"
+    )
+    parser.add_argument(
+        "--per-student",
+        action="store_true",
+        help="also export the View Modules plots of every student",
+    )
+    parser.add_argument(
+        "--per-module",
+        action="store_true",
+        help="also export the View Items plot of every module",
+    )
+    parser.add_argument(
+        "--formats", nargs="+", default=["png", "pdf"], help="image formats"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="number of processes"
+    )
+    parser.add_argument("--results", default="results", help="output folder")
+    args = parser.parse_args()
+
+    course_ids = args.courses or app.get_course_ids()
+
+    # Handling edge case
+    unknown = [
+        course_id for course_id in course_ids if course_id not in app.get_course_ids()
+    ]
+    if unknown:
+        parser.error(f"Unknown course_ids: {', '.join(unknown)}")
+
+    # The timeline spans all the completion dates, as in the dashboard
+    start_date, end_date = app.get_date_range()
+
+    views = [
+        view
+        for course_id in course_ids
+        for view in get_views(course_id, args.per_student, args.per_module)
+    ]
+
+    print(
+        f"Exporting {len(views)} views of {len(course_ids)} courses "
+        f"with {args.workers} workers"
+    )
+
+    start = time.perf_counter()
+    images = 0
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(
+                export_view, view, args.formats, start_date, end_date, args.results
+            ): view
+            for view in views
+        }
+        for future in as_completed(futures):
+            try:
+                course_id, written = future.result()
+                images += written
+            except Exception as error:
+                failed += 1
+                print(f"Could not export {futures[future]}: {error}")
+
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"Wrote {images} images of {len(views) - failed} views in {elapsed:.1f}s, "
+        f"{images / elapsed:.1f} images/s, {(len(views) - failed) / elapsed:.2f} views/s"
+    )
+    if failed:
+        print(f"{failed} views failed")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()